@@ -1,14 +1,19 @@
 import json
 import os
 from datetime import datetime
+from time import time
 
 import pandas as pd
+import requests
 import selenium.webdriver.chrome.service as chrome_service
 from selenium.webdriver import Chrome, ChromeOptions
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as ec
 from selenium.webdriver.support.ui import WebDriverWait
 
+from src.bpm_client import BpmClient, BpmClientError
+from src.file_utils import wait_for_file
+
 
 def driver_init(executable_path: str, download_folder: str) -> Chrome:
     service = chrome_service.Service(executable_path=executable_path)
@@ -47,6 +52,50 @@ def login(
     submit_button.click()
 
 
+def download_report_selenium(
+    driver_path: str, download_folder: str, bpm_user: str, bpm_password: str
+) -> None:
+    driver = driver_init(
+        executable_path=driver_path, download_folder=download_folder
+    )
+    wait = WebDriverWait(driver, 10)
+
+    with driver:
+        login(driver, wait, bpm_user=bpm_user, bpm_password=bpm_password)
+        wait.until(
+            ec.visibility_of_element_located(
+                (By.CSS_SELECTOR, ".cp_menu_section_div_v.cp_menu_simple")
+            )
+        )
+        driver.get(
+            "https://bpmtest.kdb.kz/?s=rep_b&id=13635&reset_page=1&gid=739"
+        )
+
+        do_reports_exist = (
+            len(driver.find_elements(By.CSS_SELECTOR, ".empty_notice_header"))
+            == 0
+        )
+
+        if do_reports_exist:
+            as_excel = wait.until(
+                ec.visibility_of_element_located(
+                    (
+                        By.XPATH,
+                        '//*[@id="tab_form_card"]/table/tbody/tr[1]/td/div[1]/table/tbody/tr/td/input[4]',
+                    )
+                )
+            )
+            # Отметка с запасом на грубое разрешение mtime
+            download_started = time() - 2
+            as_excel.click()
+            wait_for_file(
+                folder=download_folder,
+                pattern="rep*.xlsx",
+                timeout=300,
+                newer_than=download_started,
+            )
+
+
 def get_from_env(key: str) -> str:
     value = os.getenv(key)
     assert isinstance(value, str), f"{key} not set in .env"
@@ -88,39 +137,20 @@ def main() -> None:
 
         df.to_excel(report_file_path, index=False)
 
-    driver = driver_init(
-        executable_path=driver_path, download_folder=download_folder
-    )
-    wait = WebDriverWait(driver, 10)
-
-    with driver:
-        login(driver, wait, bpm_user=bpm_user, bpm_password=bpm_password)
-        wait.until(
-            ec.visibility_of_element_located(
-                (By.CSS_SELECTOR, ".cp_menu_section_div_v.cp_menu_simple")
-            )
-        )
-        driver.get(
-            "https://bpmtest.kdb.kz/?s=rep_b&id=13635&reset_page=1&gid=739"
+    # NOTE: Выгрузка по HTTP, Selenium - запасной вариант
+    try:
+        with BpmClient() as client:
+            client.login(user=bpm_user, password=bpm_password)
+            client.download_report(download_folder=download_folder)
+    except (BpmClientError, requests.RequestException) as error:
+        print(f"HTTP выгрузка BPM не удалась ({error}), запуск Chrome")
+        download_report_selenium(
+            driver_path=driver_path,
+            download_folder=download_folder,
+            bpm_user=bpm_user,
+            bpm_password=bpm_password,
         )
 
-        do_reports_exist = (
-            len(driver.find_elements(By.CSS_SELECTOR, ".empty_notice_header"))
-            == 0
-        )
-
-        if do_reports_exist:
-            as_excel = wait.until(
-                ec.visibility_of_element_located(
-                    (
-                        By.XPATH,
-                        '//*[@id="tab_form_card"]/table/tbody/tr[1]/td/div[1]/table/tbody/tr/td/input[4]',
-                    )
-                )
-            )
-            as_excel.click()
-
 
 if __name__ == "__main__":
     main()
-
@@ -0,0 +1,232 @@
+import os
+import re
+from html.parser import HTMLParser
+from time import time
+from typing import Dict, List, Optional
+from urllib.parse import urljoin
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+BPM_URL = "https://bpmtest.kdb.kz/"
+REPORT_PARAMS = {"s": "rep_b", "id": "13635", "reset_page": "1", "gid": "739"}
+
+# Поля формы входа
+LOGIN_FIELD = "u_login"
+PASSWORD_FIELD = "pwd"
+# Признаки страниц BPM: меню после входа и пустой отчет
+MENU_MARKER = "cp_menu_section_div_v"
+EMPTY_REPORT_MARKER = "empty_notice_header"
+# Карточка отчета с кнопкой "в Excel" (4-я кнопка в Selenium)
+REPORT_CARD_ID = "tab_form_card"
+EXPORT_BUTTON_INDEX = 3
+
+XLSX_MAGIC = b"PK\x03\x04"
+CHUNK_SIZE = 1024 * 1024
+
+
+class BpmClientError(Exception):
+    pass
+
+
+class FormParser(HTMLParser):
+    """
+    Форма страницы BPM: адрес, метод, поля и кнопки.
+
+    Берется первая форма, в которой есть элемент с атрибутом
+    marker_attr=marker_value, например поле входа или карточка отчета.
+    """
+
+    def __init__(self, marker_attr: str, marker_value: str):
+        super().__init__(convert_charrefs=True)
+        self.marker_attr = marker_attr
+        self.marker_value = marker_value
+        self.action: Optional[str] = None
+        self.method = "get"
+        self.fields: Dict[str, str] = {}
+        self.buttons: List[Dict[str, str]] = []
+        self.form: Optional[Dict[str, str]] = None
+        self.form_fields: Dict[str, str] = {}
+        self.form_buttons: List[Dict[str, str]] = []
+        self.has_marker = False
+
+    @classmethod
+    def parse(
+        cls, html: str, marker_attr: str, marker_value: str
+    ) -> "FormParser":
+        parser = cls(marker_attr=marker_attr, marker_value=marker_value)
+        parser.feed(html)
+        parser.close()
+        return parser
+
+    def handle_starttag(self, tag, attrs):
+        attrs = {name: value or "" for name, value in attrs}
+        if tag == "form":
+            self.form = attrs
+            self.form_fields = {}
+            self.form_buttons = []
+            self.has_marker = False
+        if self.form is None or self.action is not None:
+            return
+        if attrs.get(self.marker_attr) == self.marker_value:
+            self.has_marker = True
+        if tag != "input":
+            return
+
+        input_type = attrs.get("type", "text").lower()
+        if input_type in ("button", "submit", "image"):
+            self.form_buttons.append(attrs)
+        elif input_type not in ("checkbox", "radio", "file") and attrs.get(
+            "name"
+        ):
+            self.form_fields[attrs["name"]] = attrs.get("value", "")
+
+    def handle_endtag(self, tag):
+        if tag != "form" or self.form is None:
+            return
+        if self.has_marker and self.action is None:
+            self.action = self.form.get("action", "")
+            self.method = self.form.get("method", "get").lower()
+            self.fields = self.form_fields
+            self.buttons = self.form_buttons
+        self.form = None
+
+    def close(self):
+        super().close()
+        # Незакрытая форма в конце страницы
+        self.handle_endtag("form")
+
+    def submit_button(self) -> Optional[Dict[str, str]]:
+        for button in self.buttons:
+            if button.get("type", "").lower() in ("submit", "image"):
+                return button
+        return None
+
+    def export_button(self) -> Dict[str, str]:
+        for button in self.buttons:
+            label = f"{button.get('value', '')} {button.get('name', '')}"
+            if re.search(r"excel|xls", label, flags=re.IGNORECASE):
+                return button
+        if len(self.buttons) > EXPORT_BUTTON_INDEX:
+            return self.buttons[EXPORT_BUTTON_INDEX]
+        raise BpmClientError("Excel export button not found on report page")
+
+    def request(
+        self,
+        page_url: str,
+        button: Optional[Dict[str, str]],
+        data: Dict[str, str],
+    ) -> Dict:
+        """
+        Параметры запроса отправки формы кнопкой button.
+        """
+        data = {**self.fields, **data}
+        if button is not None and button.get("name"):
+            data[button["name"]] = button.get("value", "")
+        url = urljoin(page_url, self.action or "")
+        if self.method == "post":
+            return dict(method="POST", url=url, data=data)
+        return dict(method="GET", url=url, params=data)
+
+
+class BpmClient:
+    """
+    Выгрузка отчета BPM по HTTP без браузера.
+
+    Повторяет шаги Selenium: вход формой u_login/pwd, открытие отчета
+    и отправку формы карточки кнопкой "в Excel". Сессия держит cookie
+    входа и пул соединений, файл пишется на диск по частям.
+    """
+
+    def __init__(self, base_url: str = BPM_URL, timeout: float = 60):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=2,
+            pool_maxsize=4,
+            max_retries=Retry(total=3, backoff_factor=0.5),
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def __enter__(self) -> "BpmClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.session.close()
+
+    def login(self, user: str, password: str) -> None:
+        page = self.session.get(self.base_url, timeout=self.timeout)
+        page.raise_for_status()
+
+        form = FormParser.parse(page.text, "name", LOGIN_FIELD)
+        if form.action is None:
+            raise BpmClientError("Login form not found on BPM page")
+
+        response = self.session.request(
+            **form.request(
+                page_url=page.url,
+                button=form.submit_button(),
+                data={LOGIN_FIELD: user, PASSWORD_FIELD: password},
+            ),
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        if MENU_MARKER not in response.text:
+            raise BpmClientError("BPM login failed")
+
+    def download_report(self, download_folder: str) -> Optional[str]:
+        """
+        Выгрузка отчета в download_folder.
+        Возвращает путь к файлу, либо None, если отчет пустой.
+        """
+        page = self.session.get(
+            self.base_url, params=REPORT_PARAMS, timeout=self.timeout
+        )
+        page.raise_for_status()
+        if EMPTY_REPORT_MARKER in page.text:
+            return None
+
+        form = FormParser.parse(page.text, "id", REPORT_CARD_ID)
+        if form.action is None:
+            raise BpmClientError("Report form not found on report page")
+        request = form.request(
+            page_url=page.url, button=form.export_button(), data={}
+        )
+
+        with self.session.request(
+            **request, stream=True, timeout=self.timeout
+        ) as response:
+            response.raise_for_status()
+            return self.save_stream(response, download_folder)
+
+    @staticmethod
+    def save_stream(response: requests.Response, download_folder: str) -> str:
+        match = re.search(
+            r'filename="?([^";]+)"?',
+            response.headers.get("Content-Disposition", ""),
+        )
+        file_name = os.path.basename(match.group(1)) if match else ""
+        # Дальше отчет ищется в загрузках по шаблону rep*.xlsx
+        if not (file_name.startswith("rep") and file_name.endswith(".xlsx")):
+            file_name = f"rep{REPORT_PARAMS['id']}_{int(time())}.xlsx"
+        file_path = os.path.join(download_folder, file_name)
+
+        chunks = response.iter_content(chunk_size=CHUNK_SIZE)
+        first_chunk = next(chunks, b"")
+        if not first_chunk.startswith(XLSX_MAGIC):
+            raise BpmClientError(
+                "BPM export is not an xlsx file "
+                f"({response.headers.get('Content-Type')})"
+            )
+
+        # Пока файл пишется, он не подходит под шаблон rep*.xlsx
+        tmp_path = file_path + ".part"
+        with open(tmp_path, "wb") as f:
+            f.write(first_chunk)
+            for chunk in chunks:
+                f.write(chunk)
+        os.replace(tmp_path, file_path)
+        return file_path
@@ -0,0 +1,78 @@
+from typing import Dict, Iterator, Optional
+
+import openpyxl
+
+from src.xls_reader import cell_to_str
+
+HEADER_MARKER = "Имя сотрудника"
+
+BPM_COLUMNS = {
+    "Имя сотрудника": "employee_fullname",
+    "Номер приказа": "order_number",
+    "Дата подписания": "sign_date",
+    "Дата начала": "start_date",
+    "Дата окончания": "end_date",
+    "Место командирования": "trip_place",
+    "Цель командировки": "trip_target",
+    "Номер основного приказа": "main_order_number",
+    "Дата начала основного приказа": "main_order_start_date",
+    "Имя замещающего сотрудника": "deputy_fullname",
+}
+
+
+def normalize_record(record: Dict[str, Optional[str]]) -> Dict:
+    """
+    Приведение строки отчета BPM к полям приказа.
+    """
+    deputy_fullname = record["deputy_fullname"]
+    return {
+        **record,
+        "employee_names": record["employee_fullname"].split(),
+        "deputy_names": deputy_fullname.split() if deputy_fullname else None,
+    }
+
+
+def iter_bpm_records(report_path: str) -> Iterator[Dict]:
+    """
+    Потоковое чтение отчета BPM за один проход.
+    Строка заголовка ищется по колонке "Имя сотрудника",
+    строки без сотрудника или даты подписания пропускаются.
+    """
+    workbook = openpyxl.load_workbook(
+        report_path, read_only=True, data_only=True
+    )
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+
+        positions: Optional[Dict[str, int]] = None
+        for row in rows:
+            if row and cell_to_str(row[0]) == HEADER_MARKER:
+                header = [cell_to_str(cell) for cell in row]
+                missing = set(BPM_COLUMNS) - set(header)
+                if missing:
+                    raise ValueError(
+                        f"Columns {sorted(missing)} not found in {report_path}"
+                    )
+                positions = {
+                    field: header.index(column)
+                    for column, field in BPM_COLUMNS.items()
+                }
+                break
+
+        if positions is None:
+            raise ValueError(f"Header not found in {report_path}")
+
+        for row in rows:
+            record = {
+                field: (
+                    cell_to_str(row[position]) or None
+                    if position < len(row)
+                    else None
+                )
+                for field, position in positions.items()
+            }
+            if not record["employee_fullname"] or not record["sign_date"]:
+                continue
+            yield normalize_record(record)
+    finally:
+        workbook.close()
@@ -0,0 +1,58 @@
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+
+
+class ButtonCache:
+    """
+    Кэш найденных кнопок панелей инструментов Colvir.
+
+    Хранит смещение кнопки относительно прямоугольника панели по ключу
+    (заголовок окна, панель, разрешение экрана, кнопка).
+    """
+
+    def __init__(self, cache_path: str):
+        self.cache_path = cache_path
+        self.offsets: Dict[str, List[int]] = {}
+
+        if os.path.exists(cache_path):
+            with open(cache_path, "r", encoding="utf-8") as f:
+                self.offsets = json.load(f)
+
+    @staticmethod
+    def key(
+        window_title: str,
+        toolbar_name: str,
+        resolution: Tuple[int, int],
+        button_name: str,
+    ) -> str:
+        return "|".join(
+            (
+                window_title,
+                toolbar_name,
+                f"{resolution[0]}x{resolution[1]}",
+                button_name,
+            )
+        )
+
+    def get(self, key: str) -> Optional[Tuple[int, int]]:
+        offset = self.offsets.get(key)
+        if offset is None:
+            return None
+        return offset[0], offset[1]
+
+    def set(self, key: str, offset: Tuple[int, int]) -> None:
+        if self.offsets.get(key) == list(offset):
+            return
+        self.offsets[key] = list(offset)
+        self.save()
+
+    def discard(self, key: str) -> None:
+        if self.offsets.pop(key, None) is not None:
+            self.save()
+
+    def save(self) -> None:
+        tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.offsets, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.cache_path)
@@ -0,0 +1,167 @@
+import json
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set
+
+from src.order import Order
+
+CITY_PREFIXES = ("город ", "гор. ", "гор.", "г. ", "г.")
+
+
+def normalize_city(name: str) -> str:
+    """
+    Приведение названия местоположения к ключу индекса.
+    """
+    name = name.casefold().replace("ё", "е").strip()
+    name = name.split(",")[0]
+    name = re.sub(r"\(.*?\)", "", name)
+    name = re.sub(r"\s+", " ", name).strip()
+    for prefix in CITY_PREFIXES:
+        if name.startswith(prefix):
+            name = name[len(prefix) :].strip()
+            break
+    return name
+
+
+def trigrams(name: str) -> Set[str]:
+    padded = f"  {name} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def levenshtein(a: str, b: str) -> int:
+    if len(a) < len(b):
+        a, b = b, a
+
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, start=1):
+        current = [i]
+        left = i
+        for j, char_b in enumerate(b, start=1):
+            cost = previous[j - 1] + (char_a != char_b)
+            if previous[j] + 1 < cost:
+                cost = previous[j] + 1
+            if left + 1 < cost:
+                cost = left + 1
+            current.append(cost)
+            left = cost
+        previous = current
+    return previous[-1]
+
+
+class CityMatch(NamedTuple):
+    city_code: str
+    name: str
+    score: float
+    # Оценка лучшего совпадения с другим кодом местоположения
+    runner_up: float = 0.0
+
+
+class CityResolver:
+    """
+    Индекс маппинга городов/стран BPM -> код местоположения Colvir.
+    Строится один раз при старте робота.
+    """
+
+    def __init__(
+        self,
+        cities: Dict[str, str],
+        threshold: float = 0.8,
+        margin: float = 0.05,
+        candidates: int = 10,
+    ):
+        self.threshold = threshold
+        self.margin = margin
+        self.candidates = candidates
+        self.index: Dict[str, str] = {}
+
+        aliases: Dict[str, str] = {}
+        for city_bpm, city_colvir in cities.items():
+            if city_bpm == "Наименование в SimBase":
+                continue
+
+            city_code = city_colvir.replace(f".{city_bpm}", "")
+            self.index[normalize_city(city_bpm)] = city_code
+
+            # Латинское и кириллическое написание из значения Colvir
+            for alias in city_colvir.split("."):
+                if alias and not alias.isdigit():
+                    aliases.setdefault(normalize_city(alias), city_code)
+
+        for alias, city_code in aliases.items():
+            self.index.setdefault(alias, city_code)
+
+        # Триграммный индекс для приблизительного поиска
+        self.names: List[str] = list(self.index)
+        self.trigram_index: Dict[str, List[int]] = {}
+        for name_id, name in enumerate(self.names):
+            for gram in trigrams(name):
+                self.trigram_index.setdefault(gram, []).append(name_id)
+
+    @classmethod
+    def from_file(cls, cities_json_path: str) -> "CityResolver":
+        with open(cities_json_path, "r", encoding="utf-8") as f:
+            cities = json.load(f)
+        return cls(cities)
+
+    def match(self, trip_place: str) -> Optional[CityMatch]:
+        """
+        Поиск ближайшего местоположения с оценкой схожести от 0 до 1.
+        """
+        key = normalize_city(trip_place)
+        if not key:
+            return None
+        if key in self.index:
+            return CityMatch(city_code=self.index[key], name=key, score=1.0)
+
+        shared: Counter = Counter()
+        for gram in trigrams(key):
+            shared.update(self.trigram_index.get(gram, ()))
+
+        best: Optional[CityMatch] = None
+        runner_up = 0.0
+        for name_id, _ in shared.most_common(self.candidates):
+            name = self.names[name_id]
+            longest = max(len(key), len(name))
+            # Разница длин ограничивает оценку сверху
+            if 1 - abs(len(key) - len(name)) / longest <= runner_up:
+                continue
+            score = 1 - levenshtein(key, name) / longest
+            city_code = self.index[name]
+            if best is None or score > best.score:
+                if best is not None and best.city_code != city_code:
+                    runner_up = max(runner_up, best.score)
+                best = CityMatch(city_code=city_code, name=name, score=score)
+            elif city_code != best.city_code:
+                runner_up = max(runner_up, score)
+
+        if best is None:
+            return None
+        return best._replace(runner_up=runner_up)
+
+    def resolve(self, trip_place: str) -> Optional[str]:
+        """
+        Получение кода местоположения Colvir.
+        Приблизительное совпадение принимается только выше порога
+        и если другое местоположение не подходит почти так же хорошо
+        (Оральск - Аральск или Уральск).
+        """
+        city_match = self.match(trip_place)
+        if city_match is None or city_match.score < self.threshold:
+            return None
+        if (
+            city_match.score < 1
+            and city_match.score - city_match.runner_up < self.margin
+        ):
+            return None
+        return city_match.city_code
+
+    def resolve_many(
+        self, orders: Iterable[Order]
+    ) -> Dict[str, Optional[str]]:
+        """
+        Получение кодов местоположений для всех приказов пачки.
+        """
+        return {
+            order.trip_place: self.resolve(order.trip_place)
+            for order in orders
+        }
@@ -1,21 +1,70 @@
-import json
+import functools
+import glob
 import os
 import warnings
-from datetime import datetime, timedelta
+from datetime import date, datetime
 from time import sleep
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 import dotenv
-import pandas as pd
 import pywinauto.base_wrapper
 import pywinauto.timings
 from pywinauto import mouse
 from pywinauto.win32structures import RECT
 
-from src.colvir_utils import Colvir, choose_mode, get_window
-from src.data import Button, Buttons, Order
-from src.excel_utils import xls_to_xlsx
-from src.process_utils import kill_all_processes
+from src.button_cache import ButtonCache
+from src.cities import CityResolver
+from src.colvir_utils import (
+    Colvir,
+    choose_mode,
+    close_optional_dialogs,
+    get_window,
+    wait_any_window,
+    wait_handle_closed,
+    wait_idle,
+    wait_popup_menu,
+    wait_text,
+    wait_until,
+)
+from src.colvir_service import (
+    DEFAULT_PORT,
+    Address,
+    ColvirService,
+    service_address,
+    service_addresses,
+    service_authkey,
+    submit,
+)
+from src.coordinator import merge_report, run_sharded
+from src.data import Button, Buttons
+from src.employee_directory import BLOCKED_STATUSES, EmployeeDirectory
+from src.existing_orders import ExistingOrders
+from src.file_utils import wait_for_file
+from src.ingest import load_orders
+from src.oper_calendar import BusinessCalendar
+from src.navigation import DEFAULT_FILTER_HOTKEY, Navigator
+from src.order import Order, format_colvir_date
+from src.order_state import (
+    CREATED,
+    DONE,
+    EXECUTED,
+    PENDING,
+    REGISTERED,
+    REPORTED,
+    OrderStates,
+    order_states_path,
+)
+from src.planning import plan_oper_days
+from src.process_utils import (
+    ProcessRegistry,
+    kill_all_processes,
+    registry,
+    snapshot_processes,
+)
+from src.report import RunReport
+from src.tracing import tracer, traced
+from src.validation import preflight
+from src.watermark import OrderWatermarks
 from src.wiggle import wiggle_mouse
 
 
@@ -28,84 +77,6 @@ def get_from_env(key: str) -> str:
     return value
 
 
-def load_orders(order_json_path: str) -> List[Order]:
-    """
-    Десериализация приказов из JSON файла.
-    """
-
-    with open(order_json_path, "r", encoding="utf-8") as f:
-        orders_json = json.load(f)
-
-    orders: List[Order] = [
-        Order(
-            employee_fullname=order_json["employee_fullname"],
-            employee_names=order_json["employee_names"],
-            order_number=order_json["order_number"],
-            sign_date=order_json["sign_date"],
-            start_date=order_json["start_date"],
-            end_date=order_json["end_date"],
-            trip_place=order_json["trip_place"],
-            trip_target=order_json["trip_target"],
-            main_order_number=order_json["main_order_number"],
-            main_order_start_date=order_json["main_order_start_date"],
-            deputy_fullname=order_json["deputy_fullname"],
-            deputy_names=order_json["deputy_names"],
-        )
-        for order_json in orders_json
-    ]
-
-    return orders
-
-
-def create_report(report_file_path: str):
-    """
-    Создание шаблона для финального отчета.
-    """
-    if not os.path.exists(report_file_path):
-        df = pd.DataFrame(
-            {
-                "Дата": [],
-                "Сотрудник": [],
-                "Операция": [],
-                "Номер приказа": [],
-                "Статус": [],
-            }
-        )
-        df.to_excel(report_file_path, index=False)
-
-
-def update_report(
-    person_name: str,
-    order: Order,
-    report_file_path: str,
-    today: str,
-    operation: str,
-    status: str,
-):
-    """
-    Занесение данных по текущему приказу в финальный отчет.
-    """
-    order_number = order.order_number
-
-    df = pd.read_excel(report_file_path)
-
-    if not (
-        (df["Дата"] == today)
-        & (df["Сотрудник"] == person_name)
-        & (df["Операция"] == operation)
-        & (df["Номер приказа"] == order_number)
-    ).any():
-        new_row = {
-            "Дата": today,
-            "Сотрудник": person_name,
-            "Операция": operation,
-            "Номер приказа": order_number,
-            "Статус": status,
-        }
-        df.loc[len(df)] = new_row
-        df.to_excel(report_file_path, index=False)
-
-
 def close_dialog(app: pywinauto.Application) -> None:
     """
     Закрытие диалогового окна Colvir.
@@ -114,34 +85,44 @@ def close_dialog(app: pywinauto.Application) -> None:
         app=app, title="Colvir Banking System", found_index=0
     )
     dialog_win.set_focus()
-    sleep(0.5)
+    wait_idle(dialog_win)
     dialog_win["OK"].click_input()
 
 
-def change_oper_day(app: pywinauto.Application, start_date: str):
+@traced()
+def change_oper_day(
+    app: pywinauto.Application,
+    start_date: date,
+    oper_calendar: BusinessCalendar,
+):
     """
-    Смена операционного дня. Рекурсивно в случае выходного дня.
+    Смена операционного дня. Дата берется из кэша операционных дней,
+    при отказе Colvir день запоминается и берется предыдущий.
     """
-    start_date = datetime.strptime(start_date, "%d%m%Y").strftime("%d.%m.%y")
-    current_oper_day_win = get_window(
-        app=app, title="Текущий операционный день"
-    )
-    current_oper_day_win["Edit2"].set_text(start_date)
-    current_oper_day_win["OK"].click()
-    attention_win = app.window(title="Внимание")
-    if not attention_win.exists():
-        start_date_dt = datetime.strptime(start_date, "%d.%m.%y")
-        start_date = (start_date_dt - timedelta(days=1)).strftime("%d%m%Y")
+    oper_day = oper_calendar.resolve(start_date)
+    while True:
+        current_oper_day_win = get_window(
+            app=app, title="Текущий операционный день"
+        )
+        current_oper_day_win["Edit2"].set_text(format_colvir_date(oper_day))
+        current_oper_day_win["OK"].click()
+        # Подтверждение смены дня, либо сообщение об отказе Colvir
+        attention_win = app.window(title="Внимание")
+        wait_any_window(app=app, titles=["Внимание", "Colvir Banking System"])
+        if attention_win.exists():
+            break
+
+        oper_calendar.record(oper_day=oper_day, accepted=False)
         close_dialog(app=app)
-        change_oper_day(app=app, start_date=start_date)
-        return
+        oper_day = oper_calendar.resolve(oper_day)
 
+    oper_calendar.record(oper_day=oper_day, accepted=True)
     attention_win["&Да"].click()
     current_oper_day_win["OK"].click()
-    sleep(0.5)
     close_dialog(app=app)
 
 
+@traced()
 def save_excel(app: pywinauto.Application, work_folder: str):
     """
     Сохранение Excel файла из Colvir.
@@ -149,12 +130,18 @@ def save_excel(app: pywinauto.Application, work_folder: str):
     file_win = get_window(app=app, title="Выберите файл для экспорта")
 
     orders_file_path = os.path.join(work_folder, "orders.xls")
-    orders_xlsx_file_path = os.path.join(work_folder, "orders.xlsx")
+    # Старая выгрузка не должна сойти за новую
+    if os.path.exists(orders_file_path):
+        os.remove(orders_file_path)
+
+    # Excel может запуститься через COM не дочерним процессом Colvir,
+    # поэтому своими считаются процессы, появившиеся после снимка
+    excel_before = snapshot_processes(proc_name="EXCEL")
 
     file_win["Edit4"].set_text(orders_file_path)
     file_win["&Save"].click_input()
 
-    sleep(1)
+    wait_any_window(app=app, titles=["Confirm Save As", "Сортировка"])
     confirm_win = app.window(title="Confirm Save As")
     if confirm_win.exists():
         confirm_win["Yes"].click()
@@ -162,34 +149,14 @@ def save_excel(app: pywinauto.Application, work_folder: str):
     sort_win = get_window(app=app, title="Сортировка")
     sort_win["OK"].click()
 
-    while not os.path.exists(orders_file_path):
-        sleep(5)
-    sleep(1)
-
-    kill_all_processes("EXCEL")
-
-    xls_to_xlsx(orders_file_path, orders_xlsx_file_path)
-
-    return orders_xlsx_file_path
-
+    wait_for_file(folder=work_folder, pattern="orders.xls", timeout=120)
 
-def get_colvir_city_code(trip_place: str, work_folder: str) -> Optional[str]:
-    """
-    Получение кода местоположение из маппинга городов/стран.
-    """
-    with open(
-        os.path.join(work_folder, "cities.json"), "r", encoding="utf-8"
-    ) as f:
-        cities = json.load(f)
-
-    city_bpm = trip_place.replace("город ", "").replace("г. ", "")
-    city_bpm = city_bpm.split(",")[0]
-    city_colvir = cities.get(city_bpm)
-    if not city_colvir:
-        return None
-    city_colvir = city_colvir.replace(f".{city_bpm}", "")
+    # Excel, открытый Colvir после выгрузки
+    registry.terminate(
+        registry.register_new(proc_name="EXCEL", before=excel_before)
+    )
 
-    return city_colvir
+    return orders_file_path
 
 
 def persistent_win_exists(
@@ -326,334 +293,665 @@ def get_city_mappings(
     pass
 
 
-def run():
-    # work_folder = {{PATH}}
-    # today = {{TODAY}}
-    # colvir_user = {{cred_colvir}}['username']
-    # colvir_password = {{cred_colvir}}['password']
-
-    # NOTE: Конфигурация
-    project_folder = os.path.dirname(os.path.dirname(__file__))
-    dotenv.load_dotenv(os.path.join(project_folder, ".env.test"))
+def process_order(
+    app: pywinauto.Application,
+    order: Order,
+    buttons: Buttons,
+    report: RunReport,
+    existing_orders: ExistingOrders,
+    order_states: OrderStates,
+    navigator: Navigator,
+    employees: EmployeeDirectory,
+    city_code: str,
+    export_folder: str,
+) -> None:
+    """
+    Создание и исполнение приказа по одной командировке.
+    Пройденные шаги фиксируются в order_states. Окно Персонал остается
+    открытым для следующего приказа.
+    """
+    # NOTE: Приказ заведомо не создается по известному статусу сотрудника.
+    # Проверка только когда известно, что приказа еще нет в Colvir
+    employee = employees.get(order.employee_fullname)
+    if (
+        employee is not None
+        and employee.status in BLOCKED_STATUSES
+        and existing_orders.covers(order.employee_fullname)
+        and not existing_orders.exists(
+            employee=order.employee_fullname, order_number=order.order_number
+        )
+    ):
+        report_blocked(report=report, order=order, status=employee.status)
+        return
 
-    colvir_path = get_from_env("COLVIR_PATH")
-    colvir_user = get_from_env("COLVIR_USER")
-    colvir_password = get_from_env("COLVIR_PASSWORD")
+    # Переход в Персонал (PRS), либо в фильтр уже открытого окна
+    filter_win = navigator.open_filter()
 
-    today = datetime.now().strftime("%d.%m.%y")
+    # Фильтр по имени и фамилии сотрудника
+    filter_win["Edit8"].set_text("001")
+    filter_win["Edit4"].set_text(order.employee_names[0])
+    filter_win["Edit2"].set_text(order.employee_names[1])
 
-    # work_folder = r"C:\Users\robotX4\Desktop\entering_data_on _orders\Командировки"
-    work_folder = os.path.join(project_folder, "data", "reports")
+    # Сотрудник не найден - записываем в отчет и идем дальше
+    if not navigator.apply_filter(filter_win):
+        report.add(
+            person_name=order.employee_fullname,
+            order=order,
+            operation="Создание приказа",
+            status="Приказ не найден",
+        )
+        return
 
-    report_file_path = os.path.join(
-        work_folder, f"Отчет_командировки_{today}.xlsx"
+    personal_win = get_window(app=app, title="Персонал")
+    # Переход в список приказов
+    buttons.employee_orders.find_and_click_button(
+        app=app,
+        window=personal_win,
+        toolbar=personal_win["Static4"],
+        target_button_name="Приказы по сотруднику",
     )
-    # NOTE: Создание пустого отчета по работе робота
-    create_report(report_file_path)
-
-    # Не отображать предупреждения pywinauto о 32-битном приложении
-    warnings.simplefilter(action="ignore", category=UserWarning)
-    kill_all_processes(proc_name="COLVIR")
 
-    # Координаты кнопок с динамичными местоположениями
-    buttons = Buttons()
+    orders_win = get_window(app=app, title="Приказы сотрудника")
+    # NOTE: Выгрузка приказов только для сотрудников вне общей выгрузки
+    if not existing_orders.covers(order.employee_fullname):
+        orders_win.menu_select("#4->#4->#1")
+        orders_file_path = save_excel(app=app, work_folder=export_folder)
+        existing_orders.load_employee_export(
+            file_path=orders_file_path, employee=order.employee_fullname
+        )
 
-    colvir = Colvir(
-        process_path=colvir_path, user=colvir_user, password=colvir_password
+    order_exists = existing_orders.exists(
+        employee=order.employee_fullname, order_number=order.order_number
     )
-    app = colvir.app
-
-    # Сбор приказов ранее выгружженых из BPM
-    orders_json_path = os.path.join(work_folder, f"orders_{today}.json")
-    orders: List[Order] = load_orders(orders_json_path)
 
-    # get_city_mappings(app=app, order=orders[0], buttons=buttons)  #  Сбор маппингов (не запускать просто так)
+    # Если приказ уже существуем, идем дальше
+    if order_exists:
+        orders_win.close()
 
-    for order in orders:
-        # Смена операционного дня
-        choose_mode(app=app, mode="TOPERD")
-        change_oper_day(app=app, start_date=order.start_date)
-
-        # Переход в Персонал (PRS)
-        choose_mode(app=app, mode="PRS")
-        filter_win = get_window(app=app, title="Фильтр")
-        buttons.clear_form.find_and_click_button(
-            app=app,
-            window=filter_win,
-            toolbar=filter_win["Static3"],
-            target_button_name="Очистить фильтр",
+        report.add(
+            person_name=order.employee_fullname,
+            order=order,
+            operation="Создание приказа",
+            status="Приказ уже создан",
         )
+        order_states.finish(order, DONE)
+        return
 
-        # Фильтр по имени и фамилии сотрудника
-        filter_win["Edit8"].set_text("001")
-        filter_win["Edit4"].set_text(order.employee_names[0])
-        filter_win["Edit2"].set_text(order.employee_names[1])
-        filter_win["OK"].click()
-
-        sleep(1)
-        # Данное окно выходит только в случае ненахождения сотрудника
-        # Записываем в отчет и идем дальше
-        confirm_win = app.window(title="Подтверждение")
-        if confirm_win.exists():
-            update_report(
-                person_name=order.employee_fullname,
-                order=order,
-                report_file_path=report_file_path,
-                today=today,
-                operation="Создание приказа",
-                status="Приказ не найден",
-            )
-            confirm_win.close()
-            filter_win.close()
-            personal_win = app.window(title="Персонал")
-            if personal_win.exists():
-                personal_win.close()
-            continue
+    # Подразделение, табельный номер и статус сотрудника из справочника,
+    # карточка сотрудника открывается только для новых и устаревших записей
+    if employee is None:
+        personal_win.set_focus()
+        wait_idle(personal_win)
+        personal_win.type_keys("{ENTER}")
 
-        personal_win = get_window(app=app, title="Персонал")
-        # Переход в список приказов
-        buttons.employee_orders.find_and_click_button(
-            app=app,
-            window=personal_win,
-            toolbar=personal_win["Static4"],
-            target_button_name="Приказы по сотруднику",
+        employee_card = get_window(app=app, title="Карточка сотрудника")
+        employee = employees.set(
+            fullname=order.employee_fullname,
+            branch_num=employee_card["Edit60"].window_text(),
+            tab_num=employee_card["Edit34"].window_text(),
+            status=employee_card["Edit30"].window_text().strip(),
         )
+        employee_card.close()
+    print(order.employee_fullname, employee.status)
 
-        orders_win = get_window(app=app, title="Приказы сотрудника")
-        orders_win.menu_select("#4->#4->#1")
-        orders_file_path = save_excel(app=app, work_folder=work_folder)
+    # Уволенных, командировачных и отпускных пропускаем
+    if employee.status in BLOCKED_STATUSES:
+        orders_win.close()
+        report_blocked(report=report, order=order, status=employee.status)
+        return
 
-        df = pd.read_excel(orders_file_path, skiprows=1)
+    branch_num = employee.branch_num
+    tab_num = employee.tab_num
 
-        order_exists = (
-            (df["Вид приказа"] == "Приказ о отправке работника в командировку")
-            & (df["Номер приказа"] == order.order_number)
-        ).any()
+    # Создание новой записи
+    orders_win.set_focus()
+    wait_idle(orders_win)
+    buttons.create_new_order.find_and_click_button(
+        app=app,
+        window=orders_win,
+        toolbar=orders_win["Static4"],
+        target_button_name="Создать новую запись (Ins)",
+    )
 
-        # Если приказ уже существуем, идем дальше
-        if order_exists:
-            orders_win.close()
-            personal_win.close()
+    order_win = get_window(app=app, title="Приказ")
 
-            update_report(
-                person_name=order.employee_fullname,
-                order=order,
-                report_file_path=report_file_path,
-                today=today,
-                operation="Создание приказа",
-                status="Приказ уже создан",
-            )
-            continue
+    order_win["Edit18"].type_keys("ORD_TRP", pause=0.1)
+    order_win["Edit18"].type_keys("{TAB}")
+    # Ошибка по виду приказа появляется не всегда, ждем ее ограниченно
+    if wait_any_window(
+        app=app, titles=["Произошла ошибка"], timeout=1, raise_error=False
+    ):
+        app.window(title="Произошла ошибка").close()
+        order_win["Edit38"].type_keys("{TAB}")
 
-        personal_win.set_focus()
-        sleep(1)
-        personal_win.type_keys("{ENTER}")
+    # Поле номера становится доступным, когда форма приняла вид приказа
+    order_number_field = order_win["Edit40"]
+    wait_until(
+        lambda: order_number_field.is_enabled(),
+        timeout=10,
+        message="order number field enabled",
+    )
+    order_number_field.type_keys(order.order_number, pause=0.1)
+    wait_text(order_number_field, order.order_number, timeout=5)
 
-        # Переход в карточку сотрудника. Уволенных, командировачных и отпускных пропускаем
-        employee_card = get_window(app=app, title="Карточка сотрудника")
-        employee_status = employee_card["Edit30"].window_text().strip()
-        print(order.employee_fullname, employee_status)
-        if (
-            employee_status == "Уволен"
-            or employee_status == "В командировке"
-            or employee_status == "В отпуске"
-        ):
-            employee_card.close()
-            orders_win.close()
-            personal_win.close()
-            update_report(
-                person_name=order.employee_fullname,
-                order=order,
-                report_file_path=report_file_path,
-                today=today,
-                operation="Создание приказа",
-                status=f"Невозможно создать приказ для сотрудника "
-                f'со статусом "{employee_status}"',
-            )
-            continue
+    order_win["Edit4"].click_input()
+    order_win["Edit4"].type_keys(branch_num, pause=0.2)
+    order_win.type_keys("{TAB}", pause=1)
+    order_win["Edit10"].click_input()
+    order_win["Edit10"].type_keys(tab_num, pause=0.2)
+    order_win.type_keys("{TAB}", pause=1)
 
-        # Сохранение подразделения и табельного номера сотрудника
-        branch_num = employee_card["Edit60"].window_text()
-        tab_num = employee_card["Edit34"].window_text()
-        employee_card.close()
+    if not order_win.wrapper_object().has_focus():
+        order_win.set_focus()
+    order_win["Edit22"].click_input()
+    order_win["Edit22"].set_text(order.start_date_colvir)
 
-        # Создание новой записи
-        orders_win.set_focus()
-        sleep(1)
-        buttons.create_new_order.find_and_click_button(
-            app=app,
-            window=orders_win,
-            toolbar=orders_win["Static4"],
-            target_button_name="Создать новую запись (Ins)",
-        )
+    order_win["Edit24"].click_input()
+    order_win["Edit24"].set_text(order.end_date_colvir)
 
-        order_win = get_window(app=app, title="Приказ")
+    order_win["Edit28"].type_keys(city_code, pause=0.2)
+    order_win["Edit28"].click_input()
+    order_win.type_keys("{TAB}", pause=1)
 
-        order_win["Edit18"].type_keys("ORD_TRP", pause=0.1)
-        order_win["Edit18"].type_keys("{TAB}")
-        sleep(0.5)
-        if (error_win := app.window(title="Произошла ошибка")).exists():
-            error_win.close()
-            order_win["Edit38"].type_keys("{TAB}")
+    order_win["Edit16"].type_keys(
+        order.trip_target, pause=0.1, with_spaces=True
+    )
+    order_win["Edit16"].click_input()
+    order_win.type_keys("{TAB}", pause=1)
 
-        sleep(1)
+    buttons.order_save.find_and_click_button(
+        app=app,
+        window=order_win,
+        toolbar=order_win["Static3"],
+        target_button_name="Сохранить изменения (PgDn)",
+    )
 
-        order_win["Edit40"].type_keys(order.order_number, pause=0.1)
+    orders_win.wait(wait_for="active enabled")
+    existing_orders.add(
+        employee=order.employee_fullname, order_number=order.order_number
+    )
+    order_states.advance(order, CREATED)
 
-        sleep(1)
+    buttons.operations_list.find_and_click_button(
+        app=app,
+        window=orders_win,
+        toolbar=orders_win["Static4"],
+        target_button_name="Выполнить операцию",
+    )
 
-        order_win["Edit4"].click_input()
-        order_win["Edit4"].type_keys(branch_num, pause=0.2)
-        order_win.type_keys("{TAB}", pause=1)
-        order_win["Edit10"].click_input()
-        order_win["Edit10"].type_keys(tab_num, pause=0.2)
-        order_win.type_keys("{TAB}", pause=1)
+    wait_popup_menu(app=app)
+    buttons.operation = Button(
+        buttons.operations_list.x,
+        buttons.operations_list.y + 30,
+    )
+    buttons.operation.check_and_click(
+        app=app, target_button_name="Регистрация"
+    )
 
-        if not order_win.wrapper_object().has_focus():
-            order_win.set_focus()
-        start_date = datetime.strptime(order.start_date, "%d%m%Y").strftime(
-            "%d.%m.%y"
-        )
-        end_date = datetime.strptime(order.end_date, "%d%m%Y").strftime(
-            "%d.%m.%y"
+    registration_win = get_window(app=app, title="Подтверждение")
+    registration_handle = registration_win.wrapper_object().handle
+    registration_win["&Да"].click()
+    wait_handle_closed(registration_handle)
+    # Повторное подтверждение и досье сотрудника выходят не всегда
+    close_optional_dialogs(
+        app=app, titles=["Подтверждение", "Досье сотрудника"]
+    )
+    order_states.advance(order, REGISTERED)
+
+    wiggle_mouse(duration=3)
+
+    buttons.operations_list.click()
+    wait_popup_menu(app=app)
+    buttons.operation.click()
+    confirm_win = get_window(app=app, title="Подтверждение")
+    confirm_win["&Да"].click()
+    wiggle_mouse(duration=3)
+
+    buttons.operations_list.click()
+    wait_popup_menu(app=app)
+    buttons.operation.click()
+    confirm_win = get_window(app=app, title="Подтверждение")
+    confirm_win["&Да"].click()
+    wiggle_mouse(duration=3)
+
+    command_win = app.window(title="Распоряжение на командировку")
+    if command_win.exists():
+        command_win.close()
+
+    error_win = app.window(title="Произошла ошибка")
+    if error_win.exists():
+        error_msg = error_win.child_window(class_name="Edit").window_text()
+        report.add(
+            person_name=order.employee_fullname,
+            order=order,
+            operation="Создание приказа",
+            status=f"Не удалось ИСПОЛНИТЬ приказ. Требуется проверка специалистом. "
+            f'Текст ошибки - "{error_msg}"',
         )
+        error_win.close()
+        orders_win.close()
+        return
 
-        order_win["Edit22"].click_input()
-        order_win["Edit22"].set_text(start_date)
+    order_states.advance(order, EXECUTED)
+    report_created(report=report, order=order)
+    order_states.finish(order, DONE)
+    orders_win.close()
 
-        order_win["Edit24"].click_input()
-        order_win["Edit24"].set_text(end_date)
 
-        city_code = get_colvir_city_code(
-            trip_place=order.trip_place, work_folder=work_folder
+def report_blocked(report: RunReport, order: Order, status: str) -> None:
+    report.add(
+        person_name=order.employee_fullname,
+        order=order,
+        operation="Создание приказа",
+        status=f"Невозможно создать приказ для сотрудника "
+        f'со статусом "{status}"',
+    )
+
+
+def report_created(report: RunReport, order: Order) -> None:
+    """
+    Запись об успешно исполненном приказе.
+    """
+    if order.deputy_fullname is None:
+        report.add(
+            person_name=order.employee_fullname,
+            order=order,
+            operation="Создание приказа",
+            status="Приказ создан",
         )
+        return
+
+    report.add(
+        person_name=order.deputy_fullname,
+        order=order,
+        operation="Создание приказа",
+        status=f"Приказ создан. Доплата за на период командировки сотрудника {order.employee_fullname}",
+    )
+
+
+def resume_orders(
+    orders: List[Order], report: RunReport, order_states: OrderStates
+) -> List[Order]:
+    """
+    Приказы, которые еще нужно обработать в Colvir.
+
+    Приказы, уже занесенные в отчет, пропускаются. Исполненные, но не
+    занесенные в отчет, только дописываются в отчет. Созданные, но не
+    исполненные, передаются специалисту: повторная регистрация по
+    выделенной строке может задеть чужой приказ.
+    """
+    pending = []
+    for order in orders:
+        state = order_states.get(order)
+        if state == PENDING:
+            pending.append(order)
+            continue
 
-        if city_code is None:
-            update_report(
+        if state == EXECUTED:
+            report_created(report=report, order=order)
+            order_states.finish(order, DONE)
+        elif state in (CREATED, REGISTERED):
+            report.add(
                 person_name=order.employee_fullname,
                 order=order,
-                report_file_path=report_file_path,
-                today=today,
                 operation="Создание приказа",
-                status=f"Не удалось заполнить приказ. Требуется проверка специалистом. "
-                f"Неизвестный город/местоположение - {order.trip_place}",
+                status=f"Приказ создан, но не исполнен (шаг {state}). "
+                f"Требуется проверка специалистом",
             )
-            order_win.type_keys("{ESC}")
-
-            confirm_win = get_window(app=app, title="Подтверждение")
-            confirm_win["&Нет"].click()
-
-            orders_win.close()
-            personal_win.close()
-            continue
+        order_states.advance(order, REPORTED)
+    return pending
+
+
+def run_session(
+    orders: List[Order],
+    report: RunReport,
+    city_codes: Dict[str, Optional[str]],
+    colvir_path: str,
+    colvir_user: str,
+    colvir_password: str,
+    work_folder: str,
+    colvir: Optional[Colvir] = None,
+    worker_id: Optional[int] = None,
+) -> None:
+    """
+    Обработка приказов в одной сессии Colvir.
+    Если colvir передан (сервис сессии), он не завершается после пачки.
+    worker_id - номер параллельной сессии, у нее своя папка выгрузок.
+    """
+    # NOTE: Шаги обработки приказов. После падения робота обработанные
+    # приказы пропускаются без обращения к Colvir
+    order_states = OrderStates(order_states_path(work_folder, report.today))
+    orders = resume_orders(
+        orders=orders, report=report, order_states=order_states
+    )
+    if not orders:
+        order_states.close()
+        return
 
-        order_win["Edit28"].type_keys(city_code, pause=0.2)
-        order_win["Edit28"].click_input()
-        order_win.type_keys("{TAB}", pause=1)
+    # Кэш операционных дней, принятых и отклоненных Colvir
+    oper_calendar = BusinessCalendar(
+        cache_path=os.path.join(work_folder, "oper_days.json")
+    )
 
-        order_win["Edit16"].type_keys(
-            order.trip_target, pause=0.1, with_spaces=True
+    # NOTE: Общая выгрузка приказов Colvir по сотрудникам пачки, если она есть.
+    # Выгрузку готовит специалист до запуска робота (см. .env.example)
+    existing_orders = ExistingOrders()
+    bulk_orders_file_path = os.path.join(
+        work_folder, f"orders_all_{report.today}.xlsx"
+    )
+    if os.path.exists(bulk_orders_file_path):
+        existing_orders.load_bulk(
+            file_path=bulk_orders_file_path,
+            employees={order.employee_fullname for order in orders},
         )
-        order_win["Edit16"].click_input()
-        order_win.type_keys("{TAB}", pause=1)
-
-        buttons.order_save.find_and_click_button(
-            app=app,
-            window=order_win,
-            toolbar=order_win["Static3"],
-            target_button_name="Сохранить изменения (PgDn)",
+    else:
+        print(
+            f"Нет общей выгрузки приказов {bulk_orders_file_path}, "
+            f"приказы выгружаются по каждому сотруднику"
         )
 
-        orders_win.wait(wait_for="active enabled")
+    # NOTE: Справочник сотрудников. Общая выгрузка Персонала, если она есть
+    employees = EmployeeDirectory(os.path.join(work_folder, "employees.json"))
+    bulk_employees_file_path = os.path.join(
+        work_folder, f"employees_{report.today}.xlsx"
+    )
+    if os.path.exists(bulk_employees_file_path):
+        employees.load_bulk(bulk_employees_file_path)
+
+    # NOTE: Выгрузки Excel из Colvir. Параллельные сессии не должны
+    # забирать выгрузки друг друга
+    export_folder = work_folder
+    if worker_id is not None:
+        export_folder = os.path.join(work_folder, f"w{worker_id}")
+        os.makedirs(export_folder, exist_ok=True)
+
+    # Не отображать предупреждения pywinauto о 32-битном приложении
+    warnings.simplefilter(action="ignore", category=UserWarning)
+
+    # Координаты кнопок с динамичными местоположениями
+    buttons = Buttons(
+        cache=ButtonCache(os.path.join(work_folder, "buttons.json"))
+    )
 
-        buttons.operations_list.find_and_click_button(
-            app=app,
-            window=orders_win,
-            toolbar=orders_win["Static4"],
-            target_button_name="Выполнить операцию",
+    own_colvir = colvir is None
+    if own_colvir:
+        colvir = Colvir(
+            process_path=colvir_path,
+            user=colvir_user,
+            password=colvir_password,
         )
+    app = colvir.app
+    # NOTE: Клавиша вызова фильтра в открытом Персонале, пустое значение
+    # COLVIR_FILTER_HOTKEY отключает ее
+    navigator = Navigator(
+        app=app,
+        buttons=buttons,
+        filter_hotkey=os.getenv("COLVIR_FILTER_HOTKEY", DEFAULT_FILTER_HOTKEY)
+        or None,
+    )
 
-        sleep(0.5)
-        buttons.operation = Button(
-            buttons.operations_list.x,
-            buttons.operations_list.y + 30,
+    # get_city_mappings(app=app, order=orders[0], buttons=buttons)  #  Сбор маппингов (не запускать просто так)
+
+    try:
+        for oper_day, day_orders in plan_oper_days(
+            orders, oper_day=oper_calendar.resolve
+        ):
+            # Смена операционного дня один раз на группу приказов
+            navigator.close()
+            choose_mode(app=app, mode="TOPERD")
+            change_oper_day(
+                app=app, start_date=oper_day, oper_calendar=oper_calendar
+            )
+
+            for order in day_orders:
+                with tracer.order(order.order_number):
+                    process_order(
+                        app=app,
+                        order=order,
+                        buttons=buttons,
+                        report=report,
+                        existing_orders=existing_orders,
+                        order_states=order_states,
+                        navigator=navigator,
+                        employees=employees,
+                        city_code=city_codes[order.trip_place],
+                        export_folder=export_folder,
+                    )
+                order_states.advance(order, REPORTED)
+        navigator.close()
+    finally:
+        order_states.close()
+        if own_colvir:
+            registry.terminate([app.process])
+
+
+def run_service_worker(
+    worker_id: int,
+    orders: List[Order],
+    report_file_path: str,
+    addresses: List[Address],
+    city_codes: Dict[str, Optional[str]],
+    work_folder: str,
+    today: str,
+    run_id: str,
+) -> None:
+    """
+    Отправка части приказов сервису сессии Colvir с номером worker_id.
+    Каждый сервис работает в своем сеансе Windows со своим рабочим
+    столом, мышью и клавиатурой.
+    """
+    submit(
+        address=addresses[worker_id],
+        authkey=service_authkey(),
+        message={
+            "command": "batch",
+            "orders": orders,
+            "city_codes": city_codes,
+            "report_file_path": report_file_path,
+            "today": today,
+            "work_folder": work_folder,
+            "worker_id": worker_id,
+            "run_id": run_id,
+        },
+    )
+
+
+def run_service(port: Optional[int] = None) -> None:
+    """
+    Сервис сессии Colvir: держит Colvir запущенным между запусками робота
+    и обрабатывает присланные run() пачки приказов.
+    port - порт сервиса, если в сеансах Windows запущено несколько
+    сервисов (по умолчанию первый порт COLVIR_SERVICE_PORT).
+    """
+    project_folder = os.path.dirname(os.path.dirname(__file__))
+    dotenv.load_dotenv(os.path.join(project_folder, ".env.test"))
+
+    colvir_path = get_from_env("COLVIR_PATH")
+    colvir_user = get_from_env("COLVIR_USER")
+    colvir_password = get_from_env("COLVIR_PASSWORD")
+    work_folder = os.path.join(project_folder, "data", "reports")
+
+    address = service_address() or ("127.0.0.1", DEFAULT_PORT)
+    if port is not None:
+        address = ("127.0.0.1", port)
+
+    # Отдельный список процессов: run() не должен завершать Colvir сервиса
+    registry.configure(
+        os.path.join(work_folder, f"service_pids_{address[1]}.json")
+    )
+    warnings.simplefilter(action="ignore", category=UserWarning)
+
+    def handle_batch(colvir: Colvir, message: Dict) -> None:
+        worker_id = message.get("worker_id")
+        suffix = "service" if worker_id is None else f"w{worker_id}"
+        tracer.configure(
+            os.path.join(
+                message["work_folder"],
+                f"trace_{message['today']}_{suffix}.jsonl",
+            ),
+            # Замеры пачки относятся к запуску run(), приславшему ее
+            run_id=message.get("run_id"),
         )
-        buttons.operation.check_and_click(
-            app=app, target_button_name="Регистрация"
+        run_session(
+            orders=message["orders"],
+            report=RunReport(
+                report_file_path=message["report_file_path"],
+                today=message["today"],
+            ),
+            city_codes=message["city_codes"],
+            colvir_path=colvir_path,
+            colvir_user=colvir_user,
+            colvir_password=colvir_password,
+            work_folder=message["work_folder"],
+            colvir=colvir,
+            worker_id=worker_id,
         )
 
-        registration_win = get_window(app=app, title="Подтверждение")
-        registration_win["&Да"].click()
-        sleep(2)
-        confirm_win = app.window(title="Подтверждение")
-        if confirm_win.exists():
-            confirm_win.close()
-        sleep(1)
-        dossier_win = app.window(title="Досье сотрудника")
-        if dossier_win.exists():
-            dossier_win.close()
-
-        wiggle_mouse(duration=3)
-
-        buttons.operations_list.click()
-        sleep(1)
-        buttons.operation.click()
-        confirm_win = get_window(app=app, title="Подтверждение")
-        confirm_win["&Да"].click()
-        wiggle_mouse(duration=3)
-
-        buttons.operations_list.click()
-        sleep(1)
-        buttons.operation.click()
-        confirm_win = get_window(app=app, title="Подтверждение")
-        confirm_win["&Да"].click()
-        wiggle_mouse(duration=3)
-
-        command_win = app.window(title="Распоряжение на командировку")
-        if command_win.exists():
-            command_win.close()
-
-        error_win = app.window(title="Произошла ошибка")
-        if error_win.exists():
-            error_msg = error_win.child_window(class_name="Edit").window_text()
-            update_report(
-                person_name=order.employee_fullname,
-                order=order,
-                report_file_path=report_file_path,
-                today=today,
-                operation="Создание приказа",
-                status=f"Не удалось ИСПОЛНИТЬ приказ. Требуется проверка специалистом. "
-                f'Текст ошибки - "{error_msg}"',
-            )
-            error_win.close()
-            orders_win.close()
-            personal_win.close()
-            continue
+    service = ColvirService(
+        address=address,
+        authkey=service_authkey(),
+        colvir_factory=lambda: Colvir(
+            process_path=colvir_path,
+            user=colvir_user,
+            password=colvir_password,
+        ),
+        handler=handle_batch,
+    )
+    service.serve_forever()
 
-        if order.deputy_fullname is None:
-            update_report(
-                person_name=order.employee_fullname,
-                order=order,
-                report_file_path=report_file_path,
-                today=today,
-                operation="Создание приказа",
-                status="Приказ создан",
-            )
-            orders_win.close()
-            personal_win.close()
-            continue
 
-        pass
+def run():
+    # work_folder = {{PATH}}
+    # today = {{TODAY}}
+    # colvir_user = {{cred_colvir}}['username']
+    # colvir_password = {{cred_colvir}}['password']
 
-        update_report(
-            person_name=order.deputy_fullname,
-            order=order,
-            report_file_path=report_file_path,
-            today=today,
-            operation="Создание приказа",
-            status=f"Приказ создан. Доплата за на период командировки сотрудника {order.employee_fullname}",
+    # NOTE: Конфигурация
+    project_folder = os.path.dirname(os.path.dirname(__file__))
+    dotenv.load_dotenv(os.path.join(project_folder, ".env.test"))
+
+    colvir_path = get_from_env("COLVIR_PATH")
+    colvir_user = get_from_env("COLVIR_USER")
+    colvir_password = get_from_env("COLVIR_PASSWORD")
+
+    today = datetime.now().strftime("%d.%m.%y")
+
+    # work_folder = r"C:\Users\robotX4\Desktop\entering_data_on _orders\Командировки"
+    work_folder = os.path.join(project_folder, "data", "reports")
+
+    report_file_path = os.path.join(
+        work_folder, f"Отчет_командировки_{today}.xlsx"
+    )
+    # NOTE: Замеры длительности шагов (python -m src.tracing summary <файл>)
+    tracer.configure(os.path.join(work_folder, f"trace_{today}.jsonl"))
+
+    # NOTE: Отчет по работе робота. Строки сразу пишутся в журнал
+    report = RunReport(report_file_path=report_file_path, today=today)
+
+    # NOTE: Из выгрузки BPM берутся только новые и измененные приказы,
+    # приказы, уже созданные в Colvir в прошлые запуски, пропускаются
+    watermarks = OrderWatermarks(os.path.join(work_folder, "watermarks.json"))
+
+    # Сбор приказов ранее выгружженых из BPM
+    ingested = load_orders(
+        work_folder=work_folder, today=today, watermarks=watermarks
+    )
+    orders: List[Order] = ingested.orders
+    delta = orders
+
+    # NOTE: Приказы с ошибками (неизвестный город, ФИО, даты, дубли) и
+    # строки отчета BPM, из которых не создать приказ, отсекаются до
+    # запуска Colvir
+    city_resolver = CityResolver.from_file(
+        os.path.join(work_folder, "cities.json")
+    )
+    city_codes = city_resolver.resolve_many(orders)
+    orders = preflight(
+        orders=orders,
+        city_codes=city_codes,
+        city_resolver=city_resolver,
+        report=report,
+        malformed=ingested.malformed,
+    )
+
+    # NOTE: При запущенном сервисе сессии приказы уходят ему, Colvir
+    # сервиса не завершается
+    addresses = service_addresses()
+    address = addresses[0] if addresses else None
+
+    # NOTE: Количество параллельных сессий Colvir. Робот управляет реальной
+    # мышью и клавиатурой, поэтому каждой сессии нужен свой сеанс Windows
+    # со своим сервисом сессии (порты COLVIR_SERVICE_PORT через запятую)
+    worker_count = int(os.getenv("COLVIR_WORKERS", "1"))
+    if worker_count > 1 and len(addresses) < worker_count:
+        raise ValueError(
+            f"COLVIR_WORKERS={worker_count} требует {worker_count} сервисов "
+            f"сессии Colvir в отдельных сеансах Windows, в "
+            f"COLVIR_SERVICE_PORT указано {len(addresses)}"
         )
-        orders_win.close()
-        personal_win.close()
 
-    pass
+    # NOTE: Завершение процессов, оставшихся от прошлого запуска робота.
+    # Без сохраненного списка процессов - запасной проход по всем процессам
+    pid_files = glob.glob(os.path.join(work_folder, "pids*.json"))
+    for pid_file in pid_files:
+        ProcessRegistry(state_path=pid_file).terminate_stale()
+    if not pid_files and address is None:
+        kill_all_processes(proc_name="COLVIR")
+
+    try:
+        if worker_count > 1:
+            run_sharded(
+                orders=orders,
+                worker_count=worker_count,
+                worker=functools.partial(
+                    run_service_worker,
+                    addresses=addresses,
+                    city_codes=city_codes,
+                    work_folder=work_folder,
+                    today=today,
+                    run_id=tracer.run_id,
+                ),
+                report=report,
+            )
+        elif address is not None:
+            service_report_path = (
+                os.path.splitext(report_file_path)[0] + "_service.xlsx"
+            )
+            try:
+                submit(
+                    address=address,
+                    authkey=service_authkey(),
+                    message={
+                        "command": "batch",
+                        "orders": orders,
+                        "city_codes": city_codes,
+                        "report_file_path": service_report_path,
+                        "today": today,
+                        "work_folder": work_folder,
+                        "run_id": tracer.run_id,
+                    },
+                )
+            finally:
+                merge_report(report=report, report_path=service_report_path)
+        else:
+            registry.configure(os.path.join(work_folder, "pids.json"))
+            run_session(
+                orders=orders,
+                report=report,
+                city_codes=city_codes,
+                colvir_path=colvir_path,
+                colvir_user=colvir_user,
+                colvir_password=colvir_password,
+                work_folder=work_folder,
+            )
+    finally:
+        # Отмечаются только приказы, которые есть в Colvir. Отсеянные
+        # проверкой, не найденные, заблокированные по статусу и не
+        # исполненные приказы попадут в следующий запуск
+        order_states = OrderStates(order_states_path(work_folder, today))
+        done = order_states.done()
+        order_states.close()
+        watermarks.mark(
+            order for order in delta if OrderStates.key(order) in done
+        )
+        report.render()
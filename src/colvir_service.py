@@ -0,0 +1,119 @@
+import os
+import traceback
+from datetime import date
+from multiprocessing.connection import Client, Listener
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.colvir_utils import Colvir
+from src.process_utils import registry
+
+Address = Tuple[str, int]
+# handler(colvir, message) обрабатывает пачку приказов в готовой сессии
+Handler = Callable[[Colvir, Dict[str, Any]], None]
+
+DEFAULT_PORT = 6101
+
+
+def service_addresses() -> List[Address]:
+    """
+    Адреса сервисов сессии Colvir (COLVIR_SERVICE_PORT, несколько портов
+    через запятую - по сервису на каждый сеанс Windows).
+    """
+    ports = os.getenv("COLVIR_SERVICE_PORT", "")
+    return [
+        ("127.0.0.1", int(port)) for port in ports.split(",") if port.strip()
+    ]
+
+
+def service_address() -> Optional[Address]:
+    """
+    Адрес первого сервиса сессии Colvir, если он включен.
+    """
+    addresses = service_addresses()
+    return addresses[0] if addresses else None
+
+
+def service_authkey() -> bytes:
+    return os.getenv("COLVIR_SERVICE_KEY", "business-trip").encode("utf-8")
+
+
+class ColvirService:
+    """
+    Долгоживущая сессия Colvir для нескольких запусков робота.
+
+    Colvir запускается и входит в систему один раз, пачки приказов
+    приходят через локальную очередь multiprocessing.connection.
+    Перед каждой пачкой сессия проверяется (Colvir.ensure_ready),
+    раз в день Colvir перезапускается заново.
+    """
+
+    def __init__(
+        self,
+        address: Address,
+        authkey: bytes,
+        colvir_factory: Callable[[], Colvir],
+        handler: Handler,
+    ):
+        self.address = address
+        self.authkey = authkey
+        self.colvir_factory = colvir_factory
+        self.handler = handler
+        self.colvir: Optional[Colvir] = None
+        self.started: Optional[date] = None
+
+    def get_colvir(self) -> Colvir:
+        if self.colvir is not None and self.started != date.today():
+            self.close()
+        if self.colvir is None:
+            self.colvir = self.colvir_factory()
+            self.started = date.today()
+        else:
+            self.colvir.ensure_ready()
+        return self.colvir
+
+    def handle(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        command = message.get("command")
+        if command == "ping":
+            self.get_colvir()
+        elif command == "batch":
+            self.handler(self.get_colvir(), message)
+        elif command != "stop":
+            return {"ok": False, "error": f"Unknown command {command!r}"}
+        return {"ok": True}
+
+    def serve_forever(self) -> None:
+        with Listener(self.address, authkey=self.authkey) as listener:
+            print(f"Colvir service listening on {self.address}")
+            try:
+                while True:
+                    with listener.accept() as connection:
+                        message = connection.recv()
+                        try:
+                            reply = self.handle(message)
+                        except Exception:
+                            traceback.print_exc()
+                            reply = {
+                                "ok": False,
+                                "error": traceback.format_exc(),
+                            }
+                        connection.send(reply)
+                    if message.get("command") == "stop":
+                        break
+            finally:
+                self.close()
+
+    def close(self) -> None:
+        if self.colvir is not None:
+            colvir, self.colvir = self.colvir, None
+            registry.terminate([colvir.app.process])
+
+
+def submit(address: Address, authkey: bytes, message: Dict[str, Any]) -> None:
+    """
+    Отправка команды сервису и ожидание ее выполнения.
+    """
+    with Client(address, authkey=authkey) as connection:
+        connection.send(message)
+        reply = connection.recv()
+    if not reply["ok"]:
+        raise RuntimeError(f"Colvir service failed: {reply['error']}")
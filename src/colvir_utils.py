@@ -1,34 +1,60 @@
 import re
-from time import sleep
-from typing import Tuple
+from time import monotonic, sleep
+from typing import Callable, List, Optional, Tuple
 
 import pywinauto
+import pywinauto.findbestmatch
+import pywinauto.timings
 import win32con
 import win32gui
 from pywinauto import mouse, win32functions
 
-from src.process_utils import kill_all_processes
+from src.process_utils import registry
+from src.tracing import traced
+
+
+# Модальные окна, которые остаются после ошибки посреди приказа
+ERROR_DIALOGS = ("Произошла ошибка", "Внимание", "Подтверждение")
+# Рабочие окна режимов, закрываемые перед новой пачкой приказов
+WORK_WINDOWS = (
+    "Приказ",
+    "Карточка сотрудника",
+    "Приказы сотрудника",
+    "Персонал",
+    "Фильтр",
+    "Текущий операционный день",
+)
 
 
 class Colvir:
-    def __init__(self, process_path: str, user: str, password: str):
+    def __init__(
+        self,
+        process_path: str,
+        user: str,
+        password: str,
+        app: Optional[pywinauto.Application] = None,
+    ):
         self.process_path = process_path
         self.user = user
         self.password = password
-        self.app = self.open_colvir()
+        self.app = app if app is not None else self.open_colvir()
 
+    @traced()
     def open_colvir(self) -> pywinauto.Application:
         app = None
         for _ in range(10):
             try:
                 app = pywinauto.Application().start(cmd_line=self.process_path)
+                registry.register(app.process)
                 self.login(app=app, user=self.user, password=self.password)
                 self.check_interactivity(app=app)
                 break
             except pywinauto.findwindows.ElementNotFoundError:
                 if self.change_password(app=app):
                     break
-                kill_all_processes("COLVIR")
+                # Завершается только свой процесс Colvir
+                if app is not None:
+                    registry.terminate([app.process])
                 continue
 
         assert app is not None, Exception("max_retries exceeded")
@@ -74,17 +100,66 @@ class Colvir:
 
         login_win["OK"].click()
 
-        sleep(1)
-        if login_win.exists() and app.window(title="Произошла ошибка").exists():
+        error_win = app.window(title="Произошла ошибка")
+        wait_until(
+            lambda: not login_win.exists()
+            or error_win.exists()
+            or app.window(title="Внимание").exists(),
+            timeout=10,
+            raise_error=False,
+        )
+        if login_win.exists() and error_win.exists():
             raise pywinauto.findwindows.ElementNotFoundError()
 
     @staticmethod
     def check_interactivity(app: pywinauto.Application) -> None:
         choose_mode(app=app, mode="TREPRT")
-        sleep(1)
+        wait_until(
+            lambda: app.window(title="Выбор отчета").exists(),
+            timeout=10,
+            raise_error=False,
+        )
 
         close_window(win=app.window(title="Выбор отчета"), raise_error=True)
 
+    def is_alive(self) -> bool:
+        return bool(registry.owned([self.app.process]))
+
+    def session_expired(self) -> bool:
+        return self.app.window(title="Вход в систему").exists(timeout=0)
+
+    def dismiss_dialogs(self) -> None:
+        for title in ERROR_DIALOGS + WORK_WINDOWS:
+            # Окна одного заголовка могут быть открыты друг над другом
+            for _ in range(5):
+                win = self.app.window(title=title)
+                if not win.exists(timeout=0):
+                    break
+                win.close()
+                wait_window_closed(win, timeout=5)
+
+    @traced()
+    def ensure_ready(self) -> None:
+        """
+        Проверка сессии перед пачкой приказов: процесс жив, модальные
+        окна закрыты, вход выполнен, окно выбора режима доступно.
+        Colvir перезапускается, только если сессию не удалось восстановить.
+        """
+        if self.is_alive():
+            try:
+                self.dismiss_dialogs()
+                if self.session_expired():
+                    self.login(app=self.app, user=self.user, password=self.password)
+                get_window(app=self.app, title="Выбор режима", timeout=10)
+                return
+            except (
+                pywinauto.findwindows.ElementNotFoundError,
+                pywinauto.timings.TimeoutError,
+            ):
+                registry.terminate([self.app.process])
+
+        self.app = self.open_colvir()
+
     def get_app(self) -> pywinauto.Application:
         assert self.app is not None
         return self.app
@@ -131,6 +206,7 @@ def press(win: pywinauto.WindowSpecification, key: str, pause: float = 0) -> Non
     win.type_keys(key, pause=pause, set_foreground=False)
 
 
+@traced()
 def choose_mode(app: pywinauto.Application, mode: str) -> None:
     mode_win = app.window(title="Выбор режима")
     mode_win["Edit2"].set_text(text=mode)
@@ -146,10 +222,147 @@ def close_window(win: pywinauto.WindowSpecification, raise_error: bool = False)
         raise pywinauto.findwindows.ElementNotFoundError(f"Window {win} does not exist")
 
 
+def wait_until(
+    condition: Callable[[], bool],
+    timeout: float = 20,
+    retry_interval: float = 0.1,
+    message: str = "condition",
+    raise_error: bool = True,
+) -> bool:
+    """
+    Ожидание выполнения условия вместо фиксированной паузы.
+    """
+    deadline = monotonic() + timeout
+    while True:
+        try:
+            if condition():
+                return True
+        except (
+            pywinauto.findwindows.ElementNotFoundError,
+            pywinauto.findbestmatch.MatchError,
+        ):
+            pass
+
+        if monotonic() >= deadline:
+            if raise_error:
+                raise pywinauto.timings.TimeoutError(
+                    f"Timed out after {timeout} s waiting for {message}"
+                )
+            return False
+        sleep(retry_interval)
+
+
+def wait_idle(
+    win: pywinauto.WindowSpecification, timeout: float = 20, enabled: bool = True
+) -> None:
+    """
+    Ожидание доступности окна Colvir. При enabled=True ждет, пока окно станет
+    доступным (окно с открытым модальным диалогом недоступно).
+    WaitGuiThreadIdle в pywinauto 0.6.8 только проверяет, что окно не зависло,
+    поэтому для уже открытого окна с enabled=False возврат мгновенный -
+    появление меню и диалогов нужно ждать отдельным условием.
+    """
+    win.wait(
+        wait_for="exists enabled visible" if enabled else "exists", timeout=timeout
+    )
+    win32functions.WaitGuiThreadIdle(win.wrapper_object().handle)
+
+
+def wait_text(
+    control: pywinauto.WindowSpecification, value: str, timeout: float = 20
+) -> None:
+    wait_until(
+        lambda: control.window_text().strip() == value,
+        timeout=timeout,
+        message=f"text {value!r} in {control}",
+    )
+
+
+@traced()
+def wait_any_window(
+    app: pywinauto.Application,
+    titles: List[str],
+    timeout: float = 20,
+    raise_error: bool = True,
+) -> Optional[str]:
+    """
+    Ожидание появления одного из окон. Возвращает заголовок появившегося окна,
+    либо None, если при raise_error=False ни одно окно не появилось.
+    """
+    found: List[str] = []
+
+    def any_exists() -> bool:
+        for title in titles:
+            if app.window(title=title).exists(timeout=0):
+                found.append(title)
+                return True
+        return False
+
+    wait_until(
+        any_exists,
+        timeout=timeout,
+        message=f"any of windows {titles}",
+        raise_error=raise_error,
+    )
+    return found[0] if found else None
+
+
+def wait_window_closed(win: pywinauto.WindowSpecification, timeout: float = 20) -> None:
+    win.wait_not(wait_for_not="exists", timeout=timeout)
+
+
+def wait_handle_closed(handle: int, timeout: float = 20) -> None:
+    """
+    Ожидание закрытия конкретного окна. В отличие от wait_window_closed
+    не спутает его с новым окном того же заголовка.
+    """
+    wait_until(
+        lambda: not win32gui.IsWindow(handle),
+        timeout=timeout,
+        message=f"window {handle} closed",
+    )
+
+
+def wait_popup_menu(app: pywinauto.Application, timeout: float = 10) -> None:
+    """
+    Ожидание отрисовки всплывающего меню (класс окна #32768).
+    """
+    menu = app.window(class_name="#32768")
+    wait_until(
+        lambda: menu.exists(timeout=0) and menu.is_visible(),
+        timeout=timeout,
+        message="popup menu",
+    )
+
+
+def close_optional_dialogs(
+    app: pywinauto.Application, titles: List[str], timeout: float = 3
+) -> List[str]:
+    """
+    Закрытие необязательных диалогов, которые Colvir может показать после
+    операции. Каждый следующий диалог ждется не дольше timeout.
+    Возвращает заголовки закрытых окон.
+    """
+    closed: List[str] = []
+    while len(closed) < 10:
+        title = wait_any_window(
+            app=app, titles=titles, timeout=timeout, raise_error=False
+        )
+        if title is None:
+            break
+        win = app.window(title=title)
+        handle = win.wrapper_object().handle
+        win.close()
+        wait_handle_closed(handle, timeout=timeout)
+        closed.append(title)
+    return closed
+
+
+@traced()
 def get_window(
     app: pywinauto.Application,
     title: str,
-    wait_for: str = "exists",
+    wait_for: str = "exists enabled visible",
     timeout: int = 20,
     regex: bool = False,
     found_index: int = 0,
@@ -160,23 +373,20 @@ def get_window(
         else app.window(title_re=title, found_index=found_index)
     )
     window.wait(wait_for=wait_for, timeout=timeout)
-    sleep(0.5)
+    win32functions.WaitGuiThreadIdle(window.wrapper_object().handle)
     return window
 
 
 def type_keys(
     window: pywinauto.WindowSpecification,
     keystrokes: str,
-    step_delay: float = 0.1,
-    delay_after: float = 0.5,
+    timeout: float = 20,
 ) -> None:
     set_focus(window)
     for command in list(filter(None, re.split(r"({.+?})", keystrokes))):
         try:
             window.type_keys(command, set_foreground=False)
         except pywinauto.base_wrapper.ElementNotEnabled:
-            sleep(1)
+            wait_idle(window, timeout=timeout)
             window.type_keys(command, set_foreground=False)
-        sleep(step_delay)
-
-    sleep(delay_after)
+        win32functions.WaitGuiThreadIdle(window.wrapper_object().handle)
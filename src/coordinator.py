@@ -0,0 +1,90 @@
+import os
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, List
+
+from src.existing_orders import normalize_employee
+from src.order import Order
+from src.report import RunReport
+
+# worker(worker_id, orders, report_file_path) обрабатывает свою часть приказов
+# в отдельной сессии Colvir и пишет строки отчета в свой журнал
+Worker = Callable[[int, List[Order], str], None]
+
+
+def partition_orders(
+    orders: List[Order], worker_count: int
+) -> List[List[Order]]:
+    """
+    Разбиение приказов на части по сотрудникам.
+    Приказы одного сотрудника всегда попадают в одну часть, части
+    выравниваются по количеству приказов, исходный порядок сохраняется.
+    """
+    groups: Dict[str, List[int]] = {}
+    for index, order in enumerate(orders):
+        groups.setdefault(
+            normalize_employee(order.employee_fullname), []
+        ).append(index)
+
+    partitions: List[List[int]] = [[] for _ in range(max(1, worker_count))]
+    for indexes in sorted(groups.values(), key=len, reverse=True):
+        min(partitions, key=len).extend(indexes)
+
+    return [
+        [orders[index] for index in sorted(indexes)]
+        for indexes in partitions
+        if indexes
+    ]
+
+
+def worker_report_path(report_file_path: str, worker_id: int) -> str:
+    base, ext = os.path.splitext(report_file_path)
+    return f"{base}_w{worker_id}{ext}"
+
+
+def merge_report(report: RunReport, report_path: str) -> None:
+    """
+    Перенос строк журнала другого процесса в общий отчет.
+    """
+    other_report = RunReport(report_file_path=report_path, today=report.today)
+    report.merge(other_report)
+    if os.path.exists(other_report.journal_path):
+        os.remove(other_report.journal_path)
+
+
+def run_sharded(
+    orders: List[Order],
+    worker_count: int,
+    worker: Worker,
+    report: RunReport,
+) -> None:
+    """
+    Параллельная обработка приказов несколькими процессами-обработчиками.
+    Журналы обработчиков сливаются в общий отчет, в том числе после падения
+    обработчика - уже записанные им строки не теряются.
+    """
+    partitions = partition_orders(orders, worker_count)
+    report_paths = [
+        worker_report_path(report.report_file_path, worker_id)
+        for worker_id in range(len(partitions))
+    ]
+
+    try:
+        with ProcessPoolExecutor(max_workers=len(partitions) or 1) as executor:
+            futures = {
+                executor.submit(worker, worker_id, partition, report_path): (
+                    worker_id
+                )
+                for worker_id, (partition, report_path) in enumerate(
+                    zip(partitions, report_paths)
+                )
+            }
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception:
+                    print(f"Worker {futures[future]} failed")
+                    traceback.print_exc()
+    finally:
+        for report_path in report_paths:
+            merge_report(report=report, report_path=report_path)
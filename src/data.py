@@ -1,15 +1,61 @@
 import dataclasses
-from time import sleep
 from typing import Tuple, Optional
 
 import pywinauto
+import win32api
 from pywinauto import mouse
 
+from src.button_cache import ButtonCache
+from src.colvir_utils import wait_idle, wait_text, wait_until
+from src.toolbar_search import ButtonNotFoundError, Probe, locate_button
+from src.tracing import traced
+
+
+def find_toolbar_button(
+    toolbar: pywinauto.WindowSpecification,
+    probe: Probe,
+    target_button_name: str,
+    horizontal: bool = True,
+    coarse_step: int = 12,
+) -> Tuple[int, int]:
+    """
+    Поиск экранных координат кнопки на панели инструментов.
+    У стандартной панели Win32 прямоугольники кнопок берутся
+    через TB_BUTTONCOUNT/TB_GETITEMRECT, иначе - поиском наведением.
+    """
+    if toolbar.class_name() == "ToolbarWindow32":
+        wrapper = toolbar.wrapper_object()
+        for index in range(wrapper.button_count()):
+            mid_point = wrapper.get_button_rect(index).mid_point()
+            x, y = wrapper.client_to_screen((mid_point.x, mid_point.y))
+            if probe(x, y) == target_button_name:
+                return x, y
+        raise ButtonNotFoundError(
+            f"Button {target_button_name!r} not found on toolbar"
+        )
+
+    rectangle = toolbar.rectangle()
+    return locate_button(
+        probe=probe,
+        rectangle=(
+            rectangle.left,
+            rectangle.top,
+            rectangle.right,
+            rectangle.bottom,
+        ),
+        target=target_button_name,
+        horizontal=horizontal,
+        coarse_step=coarse_step,
+    )
+
 
 @dataclasses.dataclass
 class Button:
     x: int = -1
     y: int = -1
+    cache: Optional[ButtonCache] = dataclasses.field(
+        default=None, repr=False, compare=False
+    )
 
     def click(self) -> None:
         mouse.click(button="left", coords=(self.x, self.y))
@@ -19,9 +65,11 @@ class Button:
     ) -> None:
         mouse.move(coords=(self.x, self.y))
         status_bar = app.window(title_re="Банковская система.+")["StatusBar"]
-        if status_bar.window_text().strip() == target_button_name:
-            self.click()
+        # Подсказка в строке состояния появляется не сразу после наведения
+        wait_text(status_bar, target_button_name, timeout=5)
+        self.click()
 
+    @traced()
     def find_and_click_button(
         self,
         app: pywinauto.Application,
@@ -29,7 +77,7 @@ class Button:
         toolbar: pywinauto.WindowSpecification,
         target_button_name: str,
         horizontal: bool = True,
-        offset: int = 5,
+        coarse_step: int = 12,
     ) -> "Button":
         if self.x != -1 and self.y != -1:
             self.click()
@@ -37,65 +85,74 @@ class Button:
 
         status_win = app.window(title_re="Банковская система.+")
         rectangle = toolbar.rectangle()
-        mid_point = rectangle.mid_point()
-        mouse.move(coords=(mid_point.x, mid_point.y))
-
-        start_point = rectangle.left if horizontal else rectangle.top
-        end_point = rectangle.right if horizontal else rectangle.bottom
-
-        x, y = mid_point.x, mid_point.y
-        point = 0
-
-        x_offset = offset if horizontal else 0
-        y_offset = offset if not horizontal else 0
-
-        i = 0
-        while (
-            status_win["StatusBar"].window_text().strip() != target_button_name
-            or point >= end_point
-        ):
-            point = start_point + i * 5
-
-            if horizontal:
-                x = point
-            else:
-                y = point
 
+        cache_key = None
+        if self.cache is not None:
+            cache_key = ButtonCache.key(
+                window_title=window.window_text(),
+                toolbar_name=str(toolbar.criteria[-1].get("best_match")),
+                resolution=(
+                    win32api.GetSystemMetrics(0),
+                    win32api.GetSystemMetrics(1),
+                ),
+                button_name=target_button_name,
+            )
+            cached_offset = self.cache.get(cache_key)
+            if cached_offset is not None:
+                # Одна проверка наведением вместо полного поиска
+                x = rectangle.left + cached_offset[0]
+                y = rectangle.top + cached_offset[1]
+                mouse.move(coords=(x, y))
+                status_bar = status_win["StatusBar"]
+                # Подсказка появляется с задержкой, промах - только если
+                # она не появилась за секунду
+                if wait_until(
+                    lambda: status_bar.window_text().strip()
+                    == target_button_name,
+                    timeout=1,
+                    message=f"text {target_button_name!r} in status bar",
+                    raise_error=False,
+                ):
+                    window.set_focus()
+                    wait_idle(window)
+
+                    self.x = x
+                    self.y = y
+                    self.click()
+                    return self
+
+        def probe(x: int, y: int) -> str:
             mouse.move(coords=(x, y))
-            i += 1
+            return status_win["StatusBar"].window_text().strip()
 
-        window.set_focus()
-        sleep(1)
+        x, y = find_toolbar_button(
+            toolbar=toolbar,
+            probe=probe,
+            target_button_name=target_button_name,
+            horizontal=horizontal,
+            coarse_step=coarse_step,
+        )
 
-        self.x = x + x_offset
-        self.y = y + y_offset
+        window.set_focus()
+        wait_idle(window)
+
+        self.x = x
+        self.y = y
+        if cache_key is not None:
+            self.cache.set(
+                cache_key, (self.x - rectangle.left, self.y - rectangle.top)
+            )
         self.click()
 
         return self
 
 
 class Buttons:
-    def __init__(self):
-        self.clear_form: Button = Button()
-        self.employee_orders: Button = Button()
-        self.create_new_order: Button = Button()
-        self.order_save: Button = Button()
-        self.operations_list: Button = Button()
+    def __init__(self, cache: Optional[ButtonCache] = None):
+        self.clear_form: Button = Button(cache=cache)
+        self.employee_orders: Button = Button(cache=cache)
+        self.create_new_order: Button = Button(cache=cache)
+        self.order_save: Button = Button(cache=cache)
+        self.operations_list: Button = Button(cache=cache)
         self.operation: Button = Button()
         self.cities_menu: Button = Button()
-
-
-@dataclasses.dataclass
-class Order:
-    employee_fullname: str
-    employee_names: Tuple[str, str]
-    order_number: str
-    sign_date: str
-    start_date: str
-    end_date: str
-    trip_place: str
-    trip_target: str
-    main_order_number: str
-    main_order_start_date: str
-    deputy_fullname: Optional[str]
-    deputy_names: Optional[Tuple[str, str]]
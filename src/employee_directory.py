@@ -0,0 +1,104 @@
+import json
+import os
+from time import time
+from typing import Dict, NamedTuple, Optional
+
+from src.existing_orders import normalize_employee
+from src.xls_reader import iter_xls_records
+
+# Статусы сотрудника, при которых приказ не создается
+BLOCKED_STATUSES = ("Уволен", "В командировке", "В отпуске")
+
+# Колонки общей выгрузки Персонала -> поля справочника
+BULK_COLUMNS = {
+    "Сотрудник": "fullname",
+    "Подразделение": "branch_num",
+    "Табельный номер": "tab_num",
+    "Статус": "status",
+}
+
+
+class EmployeeRecord(NamedTuple):
+    branch_num: str
+    tab_num: str
+    status: str
+    seen: float
+
+
+class EmployeeDirectory:
+    """
+    Справочник сотрудников из карточек Colvir: подразделение,
+    табельный номер и статус.
+
+    Заполняется общей выгрузкой Персонала или по мере открытия карточек.
+    Запись старше ttl секунд считается устаревшей, и карточка
+    открывается снова.
+    """
+
+    def __init__(self, cache_path: str, ttl: float = 24 * 60 * 60):
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self.records: Dict[str, EmployeeRecord] = {}
+
+        if os.path.exists(cache_path):
+            with open(cache_path, "r", encoding="utf-8") as f:
+                self.records = {
+                    employee: EmployeeRecord(*record)
+                    for employee, record in json.load(f).items()
+                }
+
+    def get(self, fullname: str) -> Optional[EmployeeRecord]:
+        record = self.records.get(normalize_employee(fullname))
+        if record is None or time() - record.seen > self.ttl:
+            return None
+        return record
+
+    def set(
+        self, fullname: str, branch_num: str, tab_num: str, status: str
+    ) -> EmployeeRecord:
+        record = EmployeeRecord(
+            branch_num=branch_num, tab_num=tab_num, status=status, seen=time()
+        )
+        self.records[normalize_employee(fullname)] = record
+        self.save()
+        return record
+
+    def load_bulk(self, file_path: str) -> None:
+        """
+        Загрузка общей выгрузки Персонала с колонками BULK_COLUMNS.
+        Время выгрузки - время изменения файла.
+        """
+        seen = os.path.getmtime(file_path)
+        for row in iter_xls_records(file_path, skiprows=1):
+            record = {
+                field: (row.get(column) or "").strip()
+                for column, field in BULK_COLUMNS.items()
+            }
+            if not record["fullname"]:
+                continue
+            employee = normalize_employee(record["fullname"])
+            # Карточка, прочитанная после выгрузки, точнее выгрузки
+            known = self.records.get(employee)
+            if known is not None and known.seen > seen:
+                continue
+            self.records[employee] = EmployeeRecord(
+                branch_num=record["branch_num"],
+                tab_num=record["tab_num"],
+                status=record["status"],
+                seen=seen,
+            )
+        self.save()
+
+    def save(self) -> None:
+        tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    employee: list(record)
+                    for employee, record in self.records.items()
+                },
+                f,
+                ensure_ascii=False,
+                indent=2,
+            )
+        os.replace(tmp_path, self.cache_path)
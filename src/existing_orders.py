@@ -0,0 +1,85 @@
+from typing import Iterable, Set, Tuple
+
+from src.xls_reader import iter_xls_records
+
+TRIP_ORDER_TYPE = "Приказ о отправке работника в командировку"
+
+OrderKey = Tuple[str, str, str]
+
+
+def normalize_employee(fullname: str) -> str:
+    return " ".join(fullname.casefold().replace("ё", "е").split())
+
+
+class ExistingOrders:
+    """
+    Индекс уже созданных в Colvir приказов
+    по ключу (сотрудник, вид приказа, номер приказа).
+
+    Заполняется одной общей выгрузкой приказов на запуск, а для
+    сотрудников вне ее - выгрузкой приказов сотрудника, не чаще
+    одного раза на сотрудника.
+    """
+
+    def __init__(self):
+        self.keys: Set[OrderKey] = set()
+        self.employees: Set[str] = set()
+
+    @staticmethod
+    def key(employee: str, order_type: str, order_number: str) -> OrderKey:
+        return (
+            normalize_employee(employee),
+            order_type.strip(),
+            str(order_number).strip(),
+        )
+
+    def load_bulk(self, file_path: str, employees: Iterable[str]) -> None:
+        """
+        Загрузка общей выгрузки приказов с колонкой "Сотрудник".
+        Покрытыми выгрузкой считаются только сотрудники из employees,
+        которые в ней есть: выгрузка готовится вручную и может быть
+        неполной, остальные сотрудники выгружаются по отдельности.
+        """
+        found: Set[str] = set()
+        for record in iter_xls_records(file_path, skiprows=1):
+            key = self.key(
+                record["Сотрудник"],
+                record["Вид приказа"],
+                record["Номер приказа"],
+            )
+            self.keys.add(key)
+            found.add(key[0])
+        self.employees.update(
+            found.intersection(normalize_employee(e) for e in employees)
+        )
+
+    def load_employee_export(self, file_path: str, employee: str) -> None:
+        """
+        Загрузка выгрузки из окна "Приказы сотрудника".
+        """
+        for record in iter_xls_records(file_path, skiprows=1):
+            self.keys.add(
+                self.key(
+                    employee, record["Вид приказа"], record["Номер приказа"]
+                )
+            )
+        self.employees.add(normalize_employee(employee))
+
+    def covers(self, employee: str) -> bool:
+        return normalize_employee(employee) in self.employees
+
+    def exists(
+        self,
+        employee: str,
+        order_number: str,
+        order_type: str = TRIP_ORDER_TYPE,
+    ) -> bool:
+        return self.key(employee, order_type, order_number) in self.keys
+
+    def add(
+        self,
+        employee: str,
+        order_number: str,
+        order_type: str = TRIP_ORDER_TYPE,
+    ) -> None:
+        self.keys.add(self.key(employee, order_type, order_number))
@@ -0,0 +1,134 @@
+import fnmatch
+import os
+from time import monotonic, sleep
+from typing import Optional, Tuple
+
+try:
+    import win32con
+    import win32event
+    import win32file
+except ImportError:
+    win32file = None
+
+TEMP_SUFFIXES = (".crdownload", ".part", ".tmp")
+
+MIN_POLL_INTERVAL = 0.05
+MAX_POLL_INTERVAL = 1.0
+
+
+class DirectoryWatcher:
+    """
+    Ожидание изменений в папке.
+
+    На Windows используются уведомления FindFirstChangeNotification,
+    в остальных случаях - опрос с растущим интервалом.
+    """
+
+    def __init__(self, folder: str):
+        self.handle = None
+        self.poll_interval = MIN_POLL_INTERVAL
+
+        if win32file is not None:
+            self.handle = win32file.FindFirstChangeNotification(
+                folder,
+                False,
+                win32con.FILE_NOTIFY_CHANGE_FILE_NAME
+                | win32con.FILE_NOTIFY_CHANGE_SIZE
+                | win32con.FILE_NOTIFY_CHANGE_LAST_WRITE,
+            )
+
+    def wait(self, timeout: float) -> None:
+        if self.handle is not None:
+            result = win32event.WaitForSingleObject(
+                self.handle, int(timeout * 1000)
+            )
+            if result == win32event.WAIT_OBJECT_0:
+                win32file.FindNextChangeNotification(self.handle)
+            return
+
+        sleep(min(self.poll_interval, timeout))
+        self.poll_interval = min(self.poll_interval * 2, MAX_POLL_INTERVAL)
+
+    def close(self) -> None:
+        if self.handle is not None:
+            win32file.FindCloseChangeNotification(self.handle)
+            self.handle = None
+
+    def __enter__(self) -> "DirectoryWatcher":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+def find_file(
+    folder: str, pattern: str, newer_than: Optional[float] = None
+) -> Optional[str]:
+    """
+    Самый свежий файл в папке по шаблону, без временных файлов загрузки.
+    """
+    latest: Optional[Tuple[float, str]] = None
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            if not entry.is_file() or entry.name.endswith(TEMP_SUFFIXES):
+                continue
+            if not fnmatch.fnmatch(entry.name, pattern):
+                continue
+            try:
+                modified = entry.stat().st_mtime
+            except OSError:
+                continue
+            if newer_than is not None and modified < newer_than:
+                continue
+            if latest is None or modified > latest[0]:
+                latest = (modified, entry.path)
+    return latest[1] if latest else None
+
+
+def is_readable(file_path: str) -> bool:
+    try:
+        with open(file_path, "rb"):
+            return True
+    except OSError:
+        return False
+
+
+def wait_for_file(
+    folder: str,
+    pattern: str,
+    timeout: float = 120,
+    settle: float = 1.0,
+    newer_than: Optional[float] = None,
+) -> str:
+    """
+    Ожидание полностью записанного файла.
+    Файл считается готовым, когда его размер не меняется в течение settle
+    секунд и его можно открыть на чтение.
+    """
+    deadline = monotonic() + timeout
+    last_seen: Optional[Tuple[str, int]] = None
+    stable_since = monotonic()
+
+    with DirectoryWatcher(folder) as watcher:
+        while True:
+            now = monotonic()
+            file_path = find_file(folder, pattern, newer_than=newer_than)
+            if file_path is not None:
+                try:
+                    size = os.path.getsize(file_path)
+                except OSError:
+                    size = -1
+
+                if (file_path, size) != last_seen:
+                    last_seen = (file_path, size)
+                    stable_since = now
+                elif now - stable_since >= settle and is_readable(file_path):
+                    return file_path
+
+            remaining = deadline - now
+            if remaining <= 0:
+                raise TimeoutError(
+                    f"File {pattern} was not completely written "
+                    f"to {folder} within {timeout} s"
+                )
+            watcher.wait(min(remaining, settle) if file_path else remaining)
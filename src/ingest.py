@@ -0,0 +1,193 @@
+import glob
+import hashlib
+import json
+import os
+import pickle
+from datetime import date
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from src.bpm_report import BPM_COLUMNS, iter_bpm_records
+from src.order import Order, parse_date
+from src.watermark import OrderWatermarks
+
+# Меняется вместе со структурой Order, чтобы не читать старый кэш
+CACHE_VERSION = 4
+
+# Поле приказа -> колонка отчета BPM, для причин в отчете робота
+FIELD_COLUMNS = {field: column for column, field in BPM_COLUMNS.items()}
+
+REQUIRED_FIELDS = (
+    "employee_fullname",
+    "order_number",
+    "sign_date",
+    "start_date",
+    "end_date",
+    "trip_place",
+)
+
+
+class MalformedRecord(NamedTuple):
+    """
+    Строка отчета BPM, из которой не получилось создать приказ.
+    """
+
+    employee_fullname: str
+    order_number: str
+    reason: str
+
+
+class IngestedOrders(NamedTuple):
+    orders: List[Order]
+    malformed: List[MalformedRecord]
+
+
+def record_date(record: Dict, field: str) -> date:
+    try:
+        return parse_date(record[field])
+    except ValueError:
+        raise ValueError(
+            f"Неизвестный формат даты в колонке "
+            f'"{FIELD_COLUMNS[field]}": {record[field]}'
+        ) from None
+
+
+def order_from_record(record: Dict) -> Order:
+    """
+    Создание приказа из нормализованной строки отчета BPM или JSON.
+    ValueError - в строке не заполнены нужные колонки или неверные даты.
+    """
+    missing = [field for field in REQUIRED_FIELDS if not record.get(field)]
+    if missing:
+        columns = ", ".join(f'"{FIELD_COLUMNS[field]}"' for field in missing)
+        raise ValueError(f"Не заполнены колонки {columns}")
+
+    main_order_start_date = record.get("main_order_start_date")
+    deputy_names = record.get("deputy_names")
+
+    return Order(
+        employee_fullname=record["employee_fullname"],
+        employee_names=tuple(record["employee_names"]),
+        order_number=str(record["order_number"]),
+        sign_date=record_date(record, "sign_date"),
+        start_date=record_date(record, "start_date"),
+        end_date=record_date(record, "end_date"),
+        trip_place=record["trip_place"],
+        trip_target=record["trip_target"],
+        main_order_number=record["main_order_number"],
+        main_order_start_date=(
+            record_date(record, "main_order_start_date")
+            if main_order_start_date
+            else None
+        ),
+        deputy_fullname=record["deputy_fullname"],
+        deputy_names=tuple(deputy_names) if deputy_names else None,
+    )
+
+
+def orders_from_records(records: Iterable[Dict]) -> IngestedOrders:
+    """
+    Приказы из строк отчета. Строки с ошибками не прерывают разбор,
+    а возвращаются отдельно для отчета робота.
+    """
+    orders = []
+    malformed = []
+    for record in records:
+        try:
+            orders.append(order_from_record(record))
+        except ValueError as error:
+            malformed.append(
+                MalformedRecord(
+                    employee_fullname=record.get("employee_fullname") or "",
+                    order_number=str(record.get("order_number") or ""),
+                    reason=str(error),
+                )
+            )
+    return IngestedOrders(orders=orders, malformed=malformed)
+
+
+def file_hash(file_path: str) -> str:
+    sha256 = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def ingest_report(
+    report_path: str,
+    cache_folder: str,
+    json_path: Optional[str] = None,
+) -> IngestedOrders:
+    """
+    Приказы и строки с ошибками из отчета BPM.
+
+    Результат разбора кэшируется по хэшу файла, поэтому повторный запуск
+    на том же отчете не разбирает его заново. json_path - необязательная
+    контрольная копия приказов в JSON.
+    """
+    cache_path = os.path.join(
+        cache_folder,
+        f"orders_v{CACHE_VERSION}_{file_hash(report_path)}.pickle",
+    )
+
+    if os.path.exists(cache_path):
+        with open(cache_path, "rb") as f:
+            ingested: IngestedOrders = pickle.load(f)
+    else:
+        records = list(iter_bpm_records(report_path))
+        ingested = orders_from_records(records)
+
+        tmp_path = cache_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(ingested, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+
+        # Кэш прошлых отчетов и версий больше не понадобится
+        for old_cache_path in glob.glob(
+            os.path.join(cache_folder, "orders_v*_*.pickle")
+        ):
+            if old_cache_path != cache_path:
+                os.remove(old_cache_path)
+
+        if json_path is not None:
+            with open(json_path, "w", encoding="utf-8") as f:
+                json.dump(records, f, ensure_ascii=False, indent=2)
+
+    return ingested
+
+
+def load_orders_json(order_json_path: str) -> IngestedOrders:
+    """
+    Десериализация приказов из JSON файла.
+    """
+    with open(order_json_path, "r", encoding="utf-8") as f:
+        orders_json = json.load(f)
+
+    return orders_from_records(orders_json)
+
+
+def load_orders(
+    work_folder: str,
+    today: str,
+    watermarks: Optional[OrderWatermarks] = None,
+) -> IngestedOrders:
+    """
+    Приказы на сегодня: из отчета BPM, а при его отсутствии -
+    из ранее сохраненного JSON, и строки отчета с ошибками.
+    С watermarks возвращаются только новые и измененные приказы.
+    """
+    report_path = os.path.join(work_folder, f"orders_{today}.xlsx")
+    json_path = os.path.join(work_folder, f"orders_{today}.json")
+
+    if os.path.exists(report_path):
+        ingested = ingest_report(
+            report_path=report_path,
+            cache_folder=work_folder,
+            json_path=json_path,
+        )
+    else:
+        ingested = load_orders_json(json_path)
+
+    if watermarks is None:
+        return ingested
+    return ingested._replace(orders=watermarks.delta(ingested.orders))
@@ -1,3 +1,5 @@
+import sys
+
 try:
     from src import colvir
 except ModuleNotFoundError as error:
@@ -5,6 +7,11 @@ except ModuleNotFoundError as error:
 
 
 def main() -> None:
+    # python -m src.main serve [порт] - сервис сессии Colvir между запусками
+    if sys.argv[1:2] == ["serve"]:
+        port = int(sys.argv[2]) if len(sys.argv) > 2 else None
+        colvir.run_service(port=port)
+        return
     colvir.run()
 
 
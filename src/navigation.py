@@ -0,0 +1,132 @@
+from typing import Optional
+
+import pywinauto
+import pywinauto.timings
+
+from src.colvir_utils import (
+    choose_mode,
+    close_window,
+    get_window,
+    type_keys,
+    wait_until,
+)
+from src.data import Buttons
+
+PERSONAL_TITLE = "Персонал"
+FILTER_TITLE = "Фильтр"
+# Окна, открываемые из Персонала по ходу приказа
+PERSONAL_CHILD_WINDOWS = (
+    "Приказ",
+    "Карточка сотрудника",
+    "Приказы сотрудника",
+)
+# Вызов фильтра в уже открытом окне Персонал по умолчанию
+DEFAULT_FILTER_HOTKEY = "{F7}"
+
+
+class Navigator:
+    """
+    Переходы к фильтру сотрудников режима Персонал (PRS).
+
+    Окно Персонал остается открытым между приказами, фильтр вызывается
+    в нем повторно клавишей filter_hotkey. Режим PRS открывается заново
+    только тогда, когда окна Персонал нет или фильтр в нем не открылся.
+    После первой неудачи клавиша до конца запуска не используется,
+    filter_hotkey=None отключает ее совсем.
+    """
+
+    def __init__(
+        self,
+        app: pywinauto.Application,
+        buttons: Buttons,
+        filter_hotkey: Optional[str] = DEFAULT_FILTER_HOTKEY,
+    ):
+        self.app = app
+        self.buttons = buttons
+        self.filter_hotkey = filter_hotkey
+        self.mode_switches = 0
+        self.reused = 0
+
+    def personal_window(self) -> pywinauto.WindowSpecification:
+        return self.app.window(title=PERSONAL_TITLE)
+
+    def open_filter(self) -> pywinauto.WindowSpecification:
+        """
+        Очищенный фильтр сотрудников.
+        """
+        if not self.app.window(title=FILTER_TITLE).exists(timeout=0):
+            if not self.reopen_filter():
+                choose_mode(app=self.app, mode="PRS")
+                self.mode_switches += 1
+
+        filter_win = get_window(app=self.app, title=FILTER_TITLE)
+        self.buttons.clear_form.find_and_click_button(
+            app=self.app,
+            window=filter_win,
+            toolbar=filter_win["Static3"],
+            target_button_name="Очистить фильтр",
+        )
+        return filter_win
+
+    def reopen_filter(self) -> bool:
+        personal_win = self.personal_window()
+        if not personal_win.exists(timeout=0):
+            return False
+        if self.filter_hotkey is None:
+            self.close()
+            return False
+
+        try:
+            self.close_children()
+            type_keys(personal_win, self.filter_hotkey)
+            get_window(app=self.app, title=FILTER_TITLE, timeout=5)
+        except (
+            pywinauto.findwindows.ElementNotFoundError,
+            pywinauto.timings.TimeoutError,
+        ):
+            # Клавиша не открыла фильтр - до конца запуска режим
+            # открывается заново без нее
+            print(
+                f"Фильтр не открылся по {self.filter_hotkey}, "
+                f"Персонал открывается через режим PRS"
+            )
+            self.filter_hotkey = None
+            self.close()
+            return False
+
+        self.reused += 1
+        return True
+
+    def apply_filter(self, filter_win: pywinauto.WindowSpecification) -> bool:
+        """
+        Применение фильтра. False - сотрудник не найден.
+        """
+        filter_win["OK"].click()
+        confirm_win = self.app.window(title="Подтверждение")
+        wait_until(
+            lambda: confirm_win.exists(timeout=0)
+            or (
+                not filter_win.exists(timeout=0)
+                and self.personal_window().exists(timeout=0)
+            ),
+            message="employee filter result",
+        )
+        if not confirm_win.exists(timeout=0):
+            return True
+
+        # Данное окно выходит только в случае ненахождения сотрудника
+        confirm_win.close()
+        close_window(win=filter_win)
+        return False
+
+    def close_children(self) -> None:
+        for title in PERSONAL_CHILD_WINDOWS:
+            close_window(win=self.app.window(title=title))
+
+    def close(self) -> None:
+        """
+        Закрытие Персонала, например перед сменой операционного дня.
+        """
+        self.close_children()
+        close_window(win=self.app.window(title=FILTER_TITLE))
+        close_window(win=self.personal_window())
@@ -0,0 +1,82 @@
+import json
+import os
+from datetime import date, timedelta
+from typing import Set
+
+# Праздничные дни РК с фиксированной датой (месяц, день).
+# Переносимые праздники (Курбан айт и т.п.) запоминаются по ответам Colvir
+HOLIDAYS = {
+    (1, 1),
+    (1, 2),
+    (1, 7),
+    (3, 8),
+    (3, 21),
+    (3, 22),
+    (3, 23),
+    (5, 1),
+    (5, 7),
+    (5, 9),
+    (7, 6),
+    (8, 30),
+    (10, 25),
+    (12, 16),
+}
+
+
+class BusinessCalendar:
+    """
+    Кэш операционных дней Colvir.
+
+    Хранит даты, которые Colvir принял или отклонил при смене
+    операционного дня. Выходные и известные праздники определяются
+    без обращения к Colvir.
+    """
+
+    def __init__(self, cache_path: str):
+        self.cache_path = cache_path
+        self.accepted: Set[date] = set()
+        self.rejected: Set[date] = set()
+
+        if os.path.exists(cache_path):
+            with open(cache_path, "r", encoding="utf-8") as f:
+                cache = json.load(f)
+            self.accepted = {date.fromisoformat(d) for d in cache["accepted"]}
+            self.rejected = {date.fromisoformat(d) for d in cache["rejected"]}
+
+    def is_business_day(self, day: date) -> bool:
+        if day in self.accepted:
+            return True
+        if day in self.rejected:
+            return False
+        return day.weekday() < 5 and (day.month, day.day) not in HOLIDAYS
+
+    def resolve(self, start_date: date) -> date:
+        """
+        Ближайший операционный день не позже даты начала.
+        """
+        day = start_date
+        while not self.is_business_day(day):
+            day -= timedelta(days=1)
+        return day
+
+    def record(self, oper_day: date, accepted: bool) -> None:
+        """
+        Запоминание ответа Colvir по операционному дню.
+        """
+        if accepted:
+            self.rejected.discard(oper_day)
+            self.accepted.add(oper_day)
+        else:
+            self.accepted.discard(oper_day)
+            self.rejected.add(oper_day)
+        self.save()
+
+    def save(self) -> None:
+        cache = {
+            "accepted": sorted(d.isoformat() for d in self.accepted),
+            "rejected": sorted(d.isoformat() for d in self.rejected),
+        }
+        tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(cache, f, indent=2)
+        os.replace(tmp_path, self.cache_path)
@@ -0,0 +1,57 @@
+import dataclasses
+import functools
+from datetime import date, datetime
+from typing import Optional, Tuple
+
+# Дата BPM, старый JSON, ISO и дата со временем из ячейки Excel
+DATE_FORMATS = (
+    "%d.%m.%Y",
+    "%d%m%Y",
+    "%Y-%m-%d",
+    "%d.%m.%Y %H:%M:%S",
+)
+
+
+def parse_date(value: str) -> date:
+    """
+    Разбор даты из отчета BPM ("dd.mm.yyyy", с временем или без)
+    или старого JSON ("ddmmyyyy").
+    """
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value.strip(), date_format).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Unknown date format: {value!r}")
+
+
+@functools.lru_cache(maxsize=None)
+def format_colvir_date(value: date) -> str:
+    """
+    Дата в формате полей Colvir (dd.mm.yy).
+    """
+    return value.strftime("%d.%m.%y")
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class Order:
+    employee_fullname: str
+    employee_names: Tuple[str, ...]
+    order_number: str
+    sign_date: date
+    start_date: date
+    end_date: date
+    trip_place: str
+    trip_target: str
+    main_order_number: str
+    main_order_start_date: Optional[date]
+    deputy_fullname: Optional[str]
+    deputy_names: Optional[Tuple[str, ...]]
+
+    @property
+    def start_date_colvir(self) -> str:
+        return format_colvir_date(self.start_date)
+
+    @property
+    def end_date_colvir(self) -> str:
+        return format_colvir_date(self.end_date)
@@ -0,0 +1,71 @@
+from datetime import date
+from typing import Callable, List, Optional, Tuple
+
+import pandas as pd
+
+from src.existing_orders import normalize_employee
+from src.order import Order
+
+
+class OrderBatch:
+    """
+    Колоночное представление списка приказов.
+
+    Группировка и поиск дублей выполняются над колонками
+    pandas, сами приказы выбираются по позиции только в конце.
+    """
+
+    def __init__(self, orders: List[Order]):
+        self.orders = orders
+        self.frame = pd.DataFrame(
+            {
+                "order_number": [order.order_number for order in orders],
+                "employee": [
+                    normalize_employee(order.employee_fullname)
+                    for order in orders
+                ],
+                "start_date": [order.start_date for order in orders],
+                "end_date": [order.end_date for order in orders],
+                "trip_place": [order.trip_place for order in orders],
+                "employee_name_count": [
+                    len(order.employee_names) for order in orders
+                ],
+                "deputy_fullname": [order.deputy_fullname for order in orders],
+                "deputy_name_count": [
+                    len(order.deputy_names or ()) for order in orders
+                ],
+            }
+        )
+
+    def __len__(self) -> int:
+        return len(self.orders)
+
+    def take(self, positions) -> List[Order]:
+        return [self.orders[position] for position in positions]
+
+    def group_by_start(
+        self, oper_day: Optional[Callable[[date], date]] = None
+    ) -> List[Tuple[date, List[Order]]]:
+        """
+        Группы приказов по дате начала (или по операционному дню,
+        если передан oper_day), по возрастанию даты.
+        oper_day вызывается один раз на каждую уникальную дату начала.
+        """
+        keys = self.frame["start_date"]
+        if oper_day is not None:
+            keys = keys.map({day: oper_day(day) for day in keys.unique()})
+
+        return [
+            (key, self.take(positions))
+            for key, positions in sorted(keys.groupby(keys).indices.items())
+        ]
+
+    def duplicated(self) -> pd.Series:
+        """
+        Маска повторных приказов с тем же номером у того же сотрудника
+        (первый не отмечается). Номер приказа BPM повторяется у разных
+        сотрудников.
+        """
+        return self.frame.duplicated(
+            subset=["employee", "order_number"], keep="first"
+        )
@@ -0,0 +1,119 @@
+import os
+import sqlite3
+from typing import Set, Tuple
+
+from src.existing_orders import normalize_employee
+from src.order import Order
+
+PENDING = "pending"
+CREATED = "created"
+REGISTERED = "registered"
+EXECUTED = "executed"
+REPORTED = "reported"
+
+# Шаги обработки приказа по порядку
+STATES = (PENDING, CREATED, REGISTERED, EXECUTED, REPORTED)
+
+# Итог обработки: приказ есть в Colvir (создан или уже был создан).
+# Только такие приказы не возвращаются в следующие запуски
+DONE = "done"
+
+StateKey = Tuple[str, str]
+
+
+def order_states_path(work_folder: str, today: str) -> str:
+    return os.path.join(work_folder, f"order_states_{today}.sqlite")
+
+
+class OrderStates:
+    """
+    Состояние обработки каждого приказа в SQLite.
+
+    Каждый переход сразу фиксируется в базе, поэтому после падения
+    робота повторный запуск знает, на каком шаге остановился приказ.
+    Состояние только растет: pending -> created -> registered ->
+    executed -> reported. Отдельно хранится итог (outcome): reported
+    означает только, что строка занесена в отчет, а приказ мог и не
+    создаться (сотрудник не найден, в отпуске, ошибка исполнения).
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        # Одна база на несколько процессов-обработчиков
+        self.connection = sqlite3.connect(db_path, timeout=30)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS order_state ("
+            "employee TEXT NOT NULL, "
+            "order_number TEXT NOT NULL, "
+            "state TEXT NOT NULL, "
+            "updated TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP, "
+            "outcome TEXT, "
+            "PRIMARY KEY (employee, order_number))"
+        )
+        # База, созданная до появления итога
+        columns = {
+            row[1]
+            for row in self.connection.execute(
+                "PRAGMA table_info(order_state)"
+            )
+        }
+        if "outcome" not in columns:
+            self.connection.execute(
+                "ALTER TABLE order_state ADD COLUMN outcome TEXT"
+            )
+        self.connection.commit()
+
+    @staticmethod
+    def key(order: Order) -> StateKey:
+        return normalize_employee(order.employee_fullname), order.order_number
+
+    def get(self, order: Order) -> str:
+        row = self.connection.execute(
+            "SELECT state FROM order_state "
+            "WHERE employee = ? AND order_number = ?",
+            self.key(order),
+        ).fetchone()
+        return row[0] if row else PENDING
+
+    def advance(self, order: Order, state: str) -> None:
+        """
+        Переход приказа в состояние state. Переход назад игнорируется.
+        """
+        if STATES.index(state) <= STATES.index(self.get(order)):
+            return
+        with self.connection:
+            self.connection.execute(
+                "INSERT INTO order_state (employee, order_number, state) "
+                "VALUES (?, ?, ?) "
+                "ON CONFLICT (employee, order_number) DO UPDATE SET "
+                "state = excluded.state, updated = CURRENT_TIMESTAMP",
+                (*self.key(order), state),
+            )
+
+    def done(self) -> Set[StateKey]:
+        """
+        Приказы с итогом DONE.
+        """
+        rows = self.connection.execute(
+            "SELECT employee, order_number FROM order_state "
+            "WHERE outcome = ?",
+            (DONE,),
+        )
+        return set(rows)
+
+    def finish(self, order: Order, outcome: str) -> None:
+        """
+        Фиксация итога обработки приказа, состояние не меняется.
+        """
+        with self.connection:
+            self.connection.execute(
+                "INSERT INTO order_state (employee, order_number, state, "
+                "outcome) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (employee, order_number) DO UPDATE SET "
+                "outcome = excluded.outcome, updated = CURRENT_TIMESTAMP",
+                (*self.key(order), self.get(order), outcome),
+            )
+
+    def close(self) -> None:
+        self.connection.close()
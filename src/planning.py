@@ -0,0 +1,15 @@
+from datetime import date
+from typing import Callable, List, Tuple
+
+from src.order import Order
+from src.order_batch import OrderBatch
+
+
+def plan_oper_days(
+    orders: List[Order], oper_day: Callable[[date], date] = lambda day: day
+) -> List[Tuple[date, List[Order]]]:
+    """
+    Группировка приказов по операционному дню.
+    Группы идут по возрастанию даты, порядок приказов внутри группы сохраняется.
+    """
+    return OrderBatch(orders).group_by_start(oper_day=oper_day)
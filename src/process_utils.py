@@ -1,10 +1,145 @@
+import json
+import os
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
 import psutil
 
 
-def kill_all_processes(proc_name: str) -> None:
-    for proc in psutil.process_iter():
+def kill_all_processes(proc_name: str, timeout: float = 5) -> None:
+    """
+    Завершение всех процессов по имени одним проходом по снимку процессов.
+    Убивает и чужие процессы, поэтому используется только как запасной вариант.
+    """
+    procs = []
+    for proc in psutil.process_iter(attrs=["name"]):
+        if proc_name in (proc.info["name"] or ""):
+            procs.append(proc)
+    stop_processes(procs, timeout=timeout)
+
+
+def snapshot_processes(proc_name: str) -> Set[Tuple[int, float]]:
+    """
+    Снимок процессов по имени: PID и время создания каждого.
+    """
+    snapshot = set()
+    for proc in psutil.process_iter(attrs=["name", "create_time"]):
+        if proc_name in (proc.info["name"] or ""):
+            snapshot.add((proc.pid, proc.info["create_time"]))
+    return snapshot
+
+
+def stop_processes(procs: List[psutil.Process], timeout: float = 5) -> None:
+    """
+    Мягкое завершение с ограниченным ожиданием, затем принудительное.
+    """
+    for proc in procs:
+        try:
+            proc.terminate()
+        except (psutil.AccessDenied, psutil.NoSuchProcess):
+            continue
+
+    _, alive = psutil.wait_procs(procs, timeout=timeout)
+    for proc in alive:
         try:
-            if proc_name in proc.name():
-                proc.terminate()
+            proc.kill()
         except (psutil.AccessDenied, psutil.NoSuchProcess):
-            continue
\ No newline at end of file
+            continue
+    psutil.wait_procs(alive, timeout=timeout)
+
+
+class ProcessRegistry:
+    """
+    Процессы, запущенные текущим запуском робота (Colvir, Excel).
+
+    Процесс хранится вместе со временем создания, чтобы не завершить
+    чужой процесс с переиспользованным PID. При заданном state_path
+    список сохраняется на диск и процессы упавшего запуска можно
+    завершить при следующем старте.
+    """
+
+    def __init__(self, state_path: Optional[str] = None):
+        self.state_path = state_path
+        self.pids: Dict[int, float] = {}
+
+    def configure(self, state_path: str) -> None:
+        self.state_path = state_path
+
+    def register(self, pid: int) -> None:
+        try:
+            self.pids[pid] = psutil.Process(pid).create_time()
+        except psutil.NoSuchProcess:
+            return
+        self.save()
+
+    def register_new(
+        self, proc_name: str, before: Set[Tuple[int, float]]
+    ) -> List[int]:
+        """
+        Регистрация процессов, появившихся после снимка before.
+        Находит и Excel, запущенный через COM, который не является
+        дочерним процессом Colvir. Учитываются только процессы
+        пользователя робота.
+        """
+        user = psutil.Process().username()
+        pids = []
+        for pid, create_time in snapshot_processes(proc_name) - before:
+            try:
+                if psutil.Process(pid).username() != user:
+                    continue
+            except (psutil.AccessDenied, psutil.NoSuchProcess):
+                continue
+            self.pids[pid] = create_time
+            pids.append(pid)
+        self.save()
+        return pids
+
+    def owned(self, pids: Iterable[int]) -> List[psutil.Process]:
+        procs = []
+        for pid in pids:
+            create_time = self.pids.get(pid)
+            if create_time is None:
+                continue
+            try:
+                proc = psutil.Process(pid)
+                if proc.create_time() == create_time:
+                    procs.append(proc)
+            except psutil.NoSuchProcess:
+                continue
+        return procs
+
+    def terminate(
+        self, pids: Optional[Iterable[int]] = None, timeout: float = 5
+    ) -> None:
+        """
+        Завершение своих процессов. Без pids завершаются все свои процессы.
+        """
+        pids = list(self.pids) if pids is None else list(pids)
+        stop_processes(self.owned(pids), timeout=timeout)
+        for pid in pids:
+            self.pids.pop(pid, None)
+        self.save()
+
+    def terminate_stale(self, timeout: float = 5) -> bool:
+        """
+        Завершение процессов, оставшихся от прошлого запуска.
+        Возвращает False, если список прошлого запуска недоступен.
+        """
+        if self.state_path is None or not os.path.exists(self.state_path):
+            return False
+
+        with open(self.state_path, "r", encoding="utf-8") as f:
+            stale = {int(pid): value for pid, value in json.load(f).items()}
+        self.pids.update(stale)
+        self.terminate(stale, timeout=timeout)
+        return True
+
+    def save(self) -> None:
+        if self.state_path is None:
+            return
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.pids, f)
+        os.replace(tmp_path, self.state_path)
+
+
+registry = ProcessRegistry()
@@ -0,0 +1,140 @@
+import json
+import os
+from typing import Dict, List, Set, Tuple
+
+import pandas as pd
+
+from src.order import Order
+
+REPORT_COLUMNS = ["Дата", "Сотрудник", "Операция", "Номер приказа", "Статус"]
+
+ReportKey = Tuple[str, str, str, str]
+
+
+class RunReport:
+    """
+    Отчет по работе робота.
+
+    Каждая строка сразу дописывается в журнал JSONL рядом с отчетом,
+    поэтому падение робота посреди запуска не теряет строки.
+    Итоговый xlsx формируется один раз методом render.
+    """
+
+    def __init__(self, report_file_path: str, today: str):
+        self.report_file_path = report_file_path
+        self.journal_path = os.path.splitext(report_file_path)[0] + ".jsonl"
+        self.today = today
+
+        self.rows: List[Dict[str, str]] = []
+        self.keys: Set[ReportKey] = set()
+
+        self.load()
+
+    @staticmethod
+    def row_key(row: Dict[str, str]) -> ReportKey:
+        return (
+            row["Дата"],
+            row["Сотрудник"],
+            row["Операция"],
+            row["Номер приказа"],
+        )
+
+    def load(self) -> None:
+        """
+        Восстановление строк из журнала, либо из уже существующего отчета.
+        """
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        row = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Недописанная строка при падении робота
+                        continue
+                    self.remember(row)
+            return
+
+        if not os.path.exists(self.report_file_path):
+            return
+
+        df = pd.read_excel(self.report_file_path, dtype=str).fillna("")
+        rows = df.reindex(columns=REPORT_COLUMNS, fill_value="").to_dict(
+            orient="records"
+        )
+        self.append_to_journal([row for row in rows if self.remember(row)])
+
+    def remember(self, row: Dict[str, str]) -> bool:
+        key = self.row_key(row)
+        if key in self.keys:
+            return False
+        self.keys.add(key)
+        self.rows.append(row)
+        return True
+
+    def append_to_journal(self, rows: List[Dict[str, str]]) -> None:
+        if not rows:
+            return
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def add(
+        self,
+        person_name: str,
+        order: Order,
+        operation: str,
+        status: str,
+    ) -> None:
+        """
+        Занесение данных по текущему приказу в отчет.
+        """
+        self.add_many([(person_name, order, operation, status)])
+
+    def add_many(self, entries: List[Tuple[str, Order, str, str]]) -> None:
+        """
+        Занесение сразу нескольких строк (сотрудник, приказ, операция,
+        статус) одной записью в журнал.
+        """
+        self.add_rows(
+            [
+                (person_name, order.order_number, operation, status)
+                for person_name, order, operation, status in entries
+            ]
+        )
+
+    def add_rows(self, entries: List[Tuple[str, str, str, str]]) -> None:
+        """
+        То же по номеру приказа, когда приказа нет, например для строки
+        отчета BPM с ошибками.
+        """
+        rows = [
+            {
+                "Дата": self.today,
+                "Сотрудник": person_name,
+                "Операция": operation,
+                "Номер приказа": order_number,
+                "Статус": status,
+            }
+            for person_name, order_number, operation, status in entries
+        ]
+        self.append_to_journal([row for row in rows if self.remember(row)])
+
+    def merge(self, other: "RunReport") -> None:
+        """
+        Перенос строк из отчета другого процесса.
+        """
+        self.append_to_journal(
+            [row for row in other.rows if self.remember(row)]
+        )
+
+    def render(self) -> str:
+        """
+        Формирование финального xlsx отчета из накопленных строк.
+        """
+        tmp_file_path = self.report_file_path + ".tmp.xlsx"
+        df = pd.DataFrame(self.rows, columns=REPORT_COLUMNS)
+        df.to_excel(tmp_file_path, index=False)
+        os.replace(tmp_file_path, self.report_file_path)
+        return self.report_file_path
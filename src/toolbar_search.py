@@ -0,0 +1,106 @@
+from typing import Callable, Tuple
+
+# Наводит мышь на точку (x, y) и возвращает текст строки состояния
+Probe = Callable[[int, int], str]
+
+Rectangle = Tuple[int, int, int, int]
+
+
+class ButtonNotFoundError(Exception):
+    pass
+
+
+class ToolbarProber:
+    """
+    Наведение на точки панели с ограниченным числом попыток.
+    """
+
+    def __init__(
+        self,
+        probe: Probe,
+        target: str,
+        cross: int,
+        horizontal: bool,
+        max_probes: int,
+    ):
+        self.probe = probe
+        self.target = target
+        self.cross = cross
+        self.horizontal = horizontal
+        self.max_probes = max_probes
+        self.probes = 0
+
+    def hits(self, point: int) -> bool:
+        if self.probes >= self.max_probes:
+            raise ButtonNotFoundError(
+                f"Button {self.target!r} not found in {self.max_probes} probes"
+            )
+        self.probes += 1
+        coords = (
+            (point, self.cross) if self.horizontal else (self.cross, point)
+        )
+        return self.probe(*coords) == self.target
+
+
+def locate_button(
+    probe: Probe,
+    rectangle: Rectangle,
+    target: str,
+    horizontal: bool = True,
+    coarse_step: int = 12,
+    max_probes: int = 100,
+) -> Tuple[int, int]:
+    """
+    Поиск центра кнопки на панели инструментов.
+
+    Сначала панель проходится с шагом меньше ширины кнопки, затем края
+    найденной кнопки уточняются двоичным поиском.
+    rectangle - (left, top, right, bottom) панели в экранных координатах.
+    """
+    left, top, right, bottom = rectangle
+    start, end = (left, right) if horizontal else (top, bottom)
+    cross = (top + bottom) // 2 if horizontal else (left + right) // 2
+
+    prober = ToolbarProber(
+        probe=probe,
+        target=target,
+        cross=cross,
+        horizontal=horizontal,
+        max_probes=max_probes,
+    )
+
+    hit = None
+    for point in range(start, end, coarse_step):
+        if prober.hits(point):
+            hit = point
+            break
+    if hit is None:
+        raise ButtonNotFoundError(f"Button {target!r} not found on toolbar")
+
+    # Левый край: между последним промахом грубого прохода и попаданием
+    miss, inside = hit - coarse_step, hit
+    if hit == start:
+        miss = inside = start
+    while inside - miss > 1:
+        middle = (miss + inside) // 2
+        if prober.hits(middle):
+            inside = middle
+        else:
+            miss = middle
+    first = inside
+
+    # Правый край: шагаем до первого промаха, затем двоичный поиск
+    inside = hit
+    miss = min(end, inside + coarse_step)
+    while miss < end and prober.hits(miss):
+        inside, miss = miss, min(end, miss + coarse_step)
+    while miss - inside > 1:
+        middle = (inside + miss) // 2
+        if prober.hits(middle):
+            inside = middle
+        else:
+            miss = middle
+    last = inside
+
+    center = (first + last) // 2
+    return (center, cross) if horizontal else (cross, center)
@@ -0,0 +1,164 @@
+import functools
+import json
+import math
+import sys
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from time import perf_counter, time
+from typing import Callable, Dict, Iterator, List, Optional
+
+
+def new_run_id() -> str:
+    return datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+
+
+class Tracer:
+    """
+    Замер длительности шагов робота.
+
+    Каждый завершенный шаг пишется строкой JSONL с номером запуска,
+    номером приказа и цепочкой вложенных шагов. Пока не задан log_path,
+    замеры не пишутся.
+    """
+
+    def __init__(self):
+        self.log_path: Optional[str] = None
+        self.run_id = new_run_id()
+        self.order_number: Optional[str] = None
+        self.stack: List[str] = []
+
+    def configure(self, log_path: str, run_id: Optional[str] = None) -> None:
+        """
+        Начало нового запуска: замеры пишутся в log_path с номером run_id
+        (по умолчанию - новый номер по текущему времени).
+        """
+        self.log_path = log_path
+        self.run_id = run_id or new_run_id()
+
+    @contextmanager
+    def order(self, order_number: str) -> Iterator[None]:
+        self.order_number = order_number
+        try:
+            with self.span("order"):
+                yield
+        finally:
+            self.order_number = None
+
+    @contextmanager
+    def span(self, step: str) -> Iterator[None]:
+        self.stack.append(step)
+        path = ";".join(self.stack)
+        started = time()
+        start = perf_counter()
+        error = None
+        try:
+            yield
+        except BaseException as exc:
+            error = type(exc).__name__
+            raise
+        finally:
+            duration = perf_counter() - start
+            self.stack.pop()
+            self.write(
+                {
+                    "run": self.run_id,
+                    "order": self.order_number,
+                    "step": step,
+                    "path": path,
+                    "started": started,
+                    "duration": duration,
+                    "error": error,
+                }
+            )
+
+    def write(self, record: Dict) -> None:
+        if self.log_path is None:
+            return
+        with open(self.log_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+tracer = Tracer()
+
+
+def traced(step: Optional[str] = None) -> Callable:
+    """
+    Декоратор замера шага. По умолчанию шаг называется по имени функции.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        name = step or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with tracer.span(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def load_spans(log_path: str) -> List[Dict]:
+    spans = []
+    with open(log_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                spans.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return spans
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    rank = max(0, math.ceil(q * len(ordered)) - 1)
+    return ordered[rank]
+
+
+def summarize(log_path: str) -> None:
+    """
+    Сводка по шагам (p50/p95) и разбивка по вложенности шагов по запускам.
+    """
+    spans = load_spans(log_path)
+
+    durations: Dict[str, List[float]] = defaultdict(list)
+    for span in spans:
+        durations[span["step"]].append(span["duration"])
+
+    print(
+        f"{'step':<30} {'count':>6} {'p50, s':>8} {'p95, s':>8} {'total, s':>9}"
+    )
+    for step, values in sorted(
+        durations.items(), key=lambda item: -sum(item[1])
+    ):
+        print(
+            f"{step:<30} {len(values):>6} {percentile(values, 0.5):>8.2f} "
+            f"{percentile(values, 0.95):>8.2f} {sum(values):>9.1f}"
+        )
+
+    runs: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+    for span in spans:
+        runs[span["run"]][span["path"]] += span["duration"]
+
+    for run_id, paths in runs.items():
+        print(f"\nrun {run_id}")
+        total = sum(
+            duration for path, duration in paths.items() if ";" not in path
+        )
+        for path in sorted(paths):
+            depth = path.count(";")
+            share = paths[path] / total if total else 0
+            bar = "#" * round(share * 40)
+            print(
+                f"{'  ' * depth}{path.split(';')[-1]:<{30 - 2 * depth}} "
+                f"{paths[path]:>8.1f} s {bar}"
+            )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] != "summary":
+        print("usage: python -m src.tracing summary <trace.jsonl>")
+        sys.exit(1)
+    summarize(sys.argv[2])
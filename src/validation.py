@@ -0,0 +1,127 @@
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.cities import CityResolver
+from src.ingest import MalformedRecord
+from src.order import Order
+from src.order_batch import OrderBatch
+from src.report import RunReport
+
+# Отдельная операция, чтобы строка о повторном номере не совпала в отчете
+# со строкой о создании первого приказа сотрудника с этим номером
+PREFLIGHT_OPERATION = "Проверка приказа"
+
+REJECTED_STATUS = (
+    "Не удалось заполнить приказ. Требуется проверка специалистом."
+)
+
+# Проверка -> причина отказа в отчете
+CHECKS = {
+    "unknown_city": "Неизвестный город/местоположение",
+    "bad_employee_name": "Не удалось разделить ФИО сотрудника",
+    "bad_deputy_name": "Не удалось разделить ФИО замещающего сотрудника",
+    "bad_dates": "Дата окончания раньше даты начала",
+    "duplicate": "Повторный номер приказа сотрудника в выгрузке",
+}
+
+
+def validate_orders(
+    batch: OrderBatch, city_codes: Dict[str, Optional[str]]
+) -> pd.DataFrame:
+    """
+    Маски проверок по всем приказам сразу, одна колонка на проверку.
+    True - приказ не прошел проверку.
+    """
+    frame = batch.frame
+    return pd.DataFrame(
+        {
+            "unknown_city": frame["trip_place"].map(city_codes).isna(),
+            "bad_employee_name": frame["employee_name_count"] < 2,
+            "bad_deputy_name": frame["deputy_fullname"].notna()
+            & (frame["deputy_name_count"] < 2),
+            "bad_dates": frame["end_date"] < frame["start_date"],
+            "duplicate": batch.duplicated(),
+        },
+        columns=list(CHECKS),
+    )
+
+
+def preflight(
+    orders: List[Order],
+    city_codes: Dict[str, Optional[str]],
+    city_resolver: CityResolver,
+    report: RunReport,
+    malformed: Sequence[MalformedRecord] = (),
+) -> List[Order]:
+    """
+    Отсев приказов, которые заведомо не получится завести в Colvir.
+    Отклоненные приказы и строки отчета BPM с ошибками (malformed)
+    заносятся в отчет одной записью, возвращаются приказы, прошедшие
+    все проверки.
+    """
+    batch = OrderBatch(orders)
+    failed = validate_orders(batch, city_codes)
+
+    rejected = failed.any(axis=1).to_numpy()
+    entries = []
+    for position in np.flatnonzero(rejected):
+        order = orders[position]
+        reasons = []
+        for check in failed.columns[failed.iloc[position].to_numpy()]:
+            reason = CHECKS[check]
+            if check == "unknown_city":
+                reason += f" - {order.trip_place}"
+                city_match = city_resolver.match(order.trip_place)
+                if city_match is not None:
+                    reason += (
+                        f". Возможно - {city_match.name} "
+                        f"({city_match.score:.0%})"
+                    )
+                    if city_match.score >= city_resolver.threshold:
+                        reason += (
+                            ", но другое местоположение подходит почти "
+                            f"так же ({city_match.runner_up:.0%})"
+                        )
+            reasons.append(reason)
+
+        entries.append(
+            (
+                order.employee_fullname,
+                order.order_number,
+                PREFLIGHT_OPERATION,
+                f"{REJECTED_STATUS} " + "; ".join(reasons),
+            )
+        )
+
+    # Приблизительно определенный город заносится в отчет для проверки
+    passed = batch.take(np.flatnonzero(~rejected))
+    for order in passed:
+        city_match = city_resolver.match(order.trip_place)
+        if city_match is not None and city_match.score < 1:
+            entries.append(
+                (
+                    order.employee_fullname,
+                    order.order_number,
+                    PREFLIGHT_OPERATION,
+                    f"Местоположение {order.trip_place} определено "
+                    f"приблизительно как {city_match.name} "
+                    f"({city_match.score:.0%})",
+                )
+            )
+
+    # Строки отчета BPM, из которых не получилось создать приказ
+    for record in malformed:
+        entries.append(
+            (
+                record.employee_fullname,
+                record.order_number,
+                PREFLIGHT_OPERATION,
+                f"{REJECTED_STATUS} Ошибка в строке отчета BPM: "
+                f"{record.reason}",
+            )
+        )
+    report.add_rows(entries)
+
+    return passed
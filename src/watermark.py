@@ -0,0 +1,79 @@
+import dataclasses
+import hashlib
+import json
+import os
+from datetime import date, timedelta
+from typing import Dict, Iterable, List
+
+from src.existing_orders import normalize_employee
+from src.order import Order
+
+
+def order_key(order: Order) -> str:
+    """
+    Сотрудник, номер приказа и дата подписания. Номер приказа BPM
+    повторяется у разных сотрудников, как и в OrderStates.key.
+    """
+    employee = normalize_employee(order.employee_fullname)
+    return f"{employee}|{order.order_number}|{order.sign_date.isoformat()}"
+
+
+def order_hash(order: Order) -> str:
+    """
+    Хэш содержимого строки отчета BPM по приказу.
+    """
+    content = json.dumps(
+        dataclasses.astuple(order), ensure_ascii=False, default=date.isoformat
+    )
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class OrderWatermarks:
+    """
+    Приказы BPM, которые в прошлых запусках уже оказались в Colvir:
+    созданы роботом или были созданы до него.
+
+    Ключ - сотрудник, номер приказа и дата подписания (order_key),
+    значение - хэш строки отчета. Приказ снова попадает в обработку,
+    только если он новый или его строка в отчете изменилась. Записи
+    старше retention_days удаляются.
+    """
+
+    def __init__(self, store_path: str, retention_days: int = 180):
+        self.store_path = store_path
+        self.retention_days = retention_days
+        self.hashes: Dict[str, str] = {}
+
+        if os.path.exists(store_path):
+            with open(store_path, "r", encoding="utf-8") as f:
+                self.hashes = json.load(f)
+
+    def delta(self, orders: List[Order]) -> List[Order]:
+        """
+        Новые и измененные приказы.
+        """
+        return [
+            order
+            for order in orders
+            if self.hashes.get(order_key(order)) != order_hash(order)
+        ]
+
+    def mark(self, orders: Iterable[Order]) -> None:
+        for order in orders:
+            self.hashes[order_key(order)] = order_hash(order)
+        self.save()
+
+    def prune(self, today: date) -> None:
+        oldest = (today - timedelta(days=self.retention_days)).isoformat()
+        self.hashes = {
+            key: value
+            for key, value in self.hashes.items()
+            if key.rsplit("|", 1)[1] >= oldest
+        }
+
+    def save(self) -> None:
+        self.prune(date.today())
+        tmp_path = f"{self.store_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.hashes, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.store_path)
@@ -3,9 +3,12 @@ from typing import Tuple
 
 import pyautogui
 
+from src.tracing import traced
+
 pyautogui.FAILSAFE = False
 
 
+@traced()
 def wiggle_mouse(duration: int) -> None:
     max_wiggles = random.randint(4, 9)
     step_sleep = duration / max_wiggles
@@ -0,0 +1,192 @@
+import re
+import xml.etree.ElementTree as ET
+from datetime import date, datetime
+from html.parser import HTMLParser
+from typing import Dict, Iterator, List, Optional
+
+import openpyxl
+
+OLE2_MAGIC = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+ZIP_MAGIC = b"PK\x03\x04"
+SPREADSHEET_NS = "urn:schemas-microsoft-com:office:spreadsheet"
+
+CHUNK_SIZE = 64 * 1024
+
+
+def cell_to_str(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        if value.time() == datetime.min.time():
+            return value.strftime("%d.%m.%Y")
+        return value.strftime("%d.%m.%Y %H:%M:%S")
+    if isinstance(value, date):
+        return value.strftime("%d.%m.%Y")
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+
+def iter_biff_rows(file_path: str) -> Iterator[List[str]]:
+    """
+    Настоящий бинарный .xls (BIFF). Читается через xlrd без Excel.
+    """
+    try:
+        import xlrd
+    except ImportError as error:
+        raise ImportError(
+            f"xlrd is required to read BIFF file {file_path}"
+        ) from error
+
+    book = xlrd.open_workbook(file_path, on_demand=True)
+    try:
+        sheet = book.sheet_by_index(0)
+        for row_index in range(sheet.nrows):
+            row = []
+            for cell in sheet.row(row_index):
+                if cell.ctype == xlrd.XL_CELL_DATE:
+                    value = xlrd.xldate.xldate_as_datetime(
+                        cell.value, book.datemode
+                    )
+                else:
+                    value = cell.value
+                row.append(cell_to_str(value))
+            yield row
+    finally:
+        book.release_resources()
+
+
+def iter_xlsx_rows(file_path: str) -> Iterator[List[str]]:
+    workbook = openpyxl.load_workbook(
+        file_path, read_only=True, data_only=True
+    )
+    try:
+        sheet = workbook.worksheets[0]
+        for row in sheet.iter_rows(values_only=True):
+            yield [cell_to_str(value) for value in row]
+    finally:
+        workbook.close()
+
+
+def iter_xml_rows(file_path: str) -> Iterator[List[str]]:
+    """
+    XML Spreadsheet 2003 с расширением .xls.
+    """
+    row_tag = f"{{{SPREADSHEET_NS}}}Row"
+    cell_tag = f"{{{SPREADSHEET_NS}}}Cell"
+    data_tag = f"{{{SPREADSHEET_NS}}}Data"
+    index_attr = f"{{{SPREADSHEET_NS}}}Index"
+
+    for event, element in ET.iterparse(file_path, events=("end",)):
+        if element.tag != row_tag:
+            continue
+
+        row: List[str] = []
+        for cell in element.iter(cell_tag):
+            index = cell.get(index_attr)
+            if index is not None:
+                row.extend([""] * (int(index) - 1 - len(row)))
+            data = cell.find(data_tag)
+            row.append(
+                "".join(data.itertext()).strip() if data is not None else ""
+            )
+        yield row
+        element.clear()
+
+
+class HTMLTableParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.rows: List[List[str]] = []
+        self.row: Optional[List[str]] = None
+        self.cell: Optional[List[str]] = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "tr":
+            self.row = []
+        elif tag in ("td", "th") and self.row is not None:
+            self.cell = []
+        elif tag == "br" and self.cell is not None:
+            self.cell.append(" ")
+
+    def handle_endtag(self, tag):
+        if (
+            tag in ("td", "th")
+            and self.row is not None
+            and self.cell is not None
+        ):
+            self.row.append(" ".join("".join(self.cell).split()))
+            self.cell = None
+        elif tag == "tr" and self.row is not None:
+            self.rows.append(self.row)
+            self.row = None
+
+    def handle_data(self, data):
+        if self.cell is not None:
+            self.cell.append(data)
+
+
+def detect_html_encoding(head: bytes) -> str:
+    match = re.search(rb"charset=[\"']?([\w-]+)", head, flags=re.IGNORECASE)
+    if match:
+        return match.group(1).decode("ascii")
+    try:
+        head.decode("utf-8")
+    except UnicodeDecodeError:
+        return "cp1251"
+    return "utf-8"
+
+
+def iter_html_rows(file_path: str) -> Iterator[List[str]]:
+    """
+    HTML таблица с расширением .xls, которую часто выгружает Colvir.
+    """
+    with open(file_path, "rb") as f:
+        encoding = detect_html_encoding(f.read(CHUNK_SIZE))
+
+    parser = HTMLTableParser()
+    with open(file_path, "r", encoding=encoding, errors="replace") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            parser.feed(chunk)
+            yield from parser.rows
+            parser.rows.clear()
+    parser.close()
+    yield from parser.rows
+
+
+def iter_xls_rows(file_path: str) -> Iterator[List[str]]:
+    """
+    Построчное чтение выгрузки Colvir без запуска Excel.
+    Формат определяется по содержимому файла, а не по расширению.
+    """
+    with open(file_path, "rb") as f:
+        head = f.read(CHUNK_SIZE)
+
+    if head.startswith(OLE2_MAGIC):
+        yield from iter_biff_rows(file_path)
+    elif head.startswith(ZIP_MAGIC):
+        yield from iter_xlsx_rows(file_path)
+    elif SPREADSHEET_NS.encode() in head:
+        yield from iter_xml_rows(file_path)
+    else:
+        yield from iter_html_rows(file_path)
+
+
+def iter_xls_records(
+    file_path: str, skiprows: int = 0
+) -> Iterator[Dict[str, str]]:
+    """
+    Строки выгрузки в виде словарей по заголовку.
+    """
+    rows = iter_xls_rows(file_path)
+    for _ in range(skiprows):
+        next(rows, None)
+
+    header = next(rows, None)
+    if header is None:
+        return
+
+    for row in rows:
+        if not any(row):
+            continue
+        yield dict(zip(header, row))
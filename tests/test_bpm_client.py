@@ -0,0 +1,138 @@
+import os
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from src.bpm_client import XLSX_MAGIC, BpmClient, BpmClientError
+
+PASSWORD = "secret"
+REPORT = XLSX_MAGIC + b"report body" * 1000
+
+LOGIN_PAGE = """
+<html><body>
+<form action="/login.php" method="post">
+  <input type="hidden" name="token" value="abc">
+  <input type="text" name="u_login">
+  <input type="password" name="pwd">
+  <input type="submit" name="submit" value="Войти">
+</form>
+</body></html>
+"""
+
+REPORT_PAGE = """
+<html><body>
+<form action="/?s=export" method="post">
+  <div id="tab_form_card">
+    <input type="hidden" name="rep_id" value="13635">
+    <input type="button" value="Печать">
+    <input type="submit" name="to_xls" value="В Excel">
+  </div>
+</form>
+</body></html>
+"""
+
+REPORT_HEADERS = {
+    "Content-Disposition": 'attachment; filename="rep13635.xlsx"',
+}
+
+EMPTY_REPORT_PAGE = '<div class="empty_notice_header">Нет данных</div>'
+
+
+class BpmStubHandler(BaseHTTPRequestHandler):
+    """
+    Страницы BPM в объеме, нужном BpmClient.
+    """
+
+    empty_report = False
+
+    def log_message(self, *args):
+        pass
+
+    def send(self, body: bytes, content_type: str, headers=None):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_html(self, html: str, headers=None):
+        self.send(html.encode("utf-8"), "text/html; charset=utf-8", headers)
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        logged_in = "sid=1" in (self.headers.get("Cookie") or "")
+        if query.get("s") == ["rep_b"] and logged_in:
+            page = EMPTY_REPORT_PAGE if self.empty_report else REPORT_PAGE
+            return self.send_html(page)
+        return self.send_html(LOGIN_PAGE)
+
+    def do_POST(self):
+        length = int(self.headers["Content-Length"])
+        data = parse_qs(self.rfile.read(length).decode("utf-8"))
+        path = urlparse(self.path)
+
+        if path.path == "/login.php":
+            if data == {
+                "token": ["abc"],
+                "u_login": ["robot"],
+                "pwd": [PASSWORD],
+                "submit": ["Войти"],
+            }:
+                return self.send_html(
+                    '<div class="cp_menu_section_div_v"></div>',
+                    headers={"Set-Cookie": "sid=1"},
+                )
+            return self.send_html(LOGIN_PAGE)
+
+        if parse_qs(path.query).get("s") == ["export"] and data == {
+            "rep_id": ["13635"],
+            "to_xls": ["В Excel"],
+        }:
+            return self.send(
+                REPORT, "application/vnd.ms-excel", REPORT_HEADERS
+            )
+        self.send_html("<html>Ошибка</html>")
+
+
+class BpmClientTest(unittest.TestCase):
+    def setUp(self):
+        BpmStubHandler.empty_report = False
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), BpmStubHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}/"
+        self.download_dir = tempfile.TemporaryDirectory()
+        self.download_folder = self.download_dir.name
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.download_dir.cleanup()
+
+    def test_download_report(self):
+        with BpmClient(base_url=self.base_url) as client:
+            client.login("robot", PASSWORD)
+            file_path = client.download_report(self.download_folder)
+
+        self.assertEqual(os.path.basename(file_path), "rep13635.xlsx")
+        with open(file_path, "rb") as f:
+            self.assertEqual(f.read(), REPORT)
+        self.assertEqual(os.listdir(self.download_folder), ["rep13635.xlsx"])
+
+    def test_empty_report(self):
+        BpmStubHandler.empty_report = True
+        with BpmClient(base_url=self.base_url) as client:
+            client.login("robot", PASSWORD)
+            self.assertIsNone(client.download_report(self.download_folder))
+
+    def test_wrong_password(self):
+        with BpmClient(base_url=self.base_url) as client:
+            with self.assertRaises(BpmClientError):
+                client.login("robot", "wrong")
+
+
+if __name__ == "__main__":
+    unittest.main()
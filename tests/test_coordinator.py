@@ -0,0 +1,167 @@
+import os
+import tempfile
+import unittest
+from datetime import date
+from typing import List
+
+from src.coordinator import (
+    merge_report,
+    partition_orders,
+    run_sharded,
+    worker_report_path,
+)
+from src.order import Order
+from src.report import RunReport
+
+TODAY = "18.10.26"
+
+
+def make_order(employee: str, order_number: str) -> Order:
+    return Order(
+        employee_fullname=employee,
+        employee_names=tuple(employee.split()),
+        order_number=order_number,
+        sign_date=date(2026, 10, 1),
+        start_date=date(2026, 10, 5),
+        end_date=date(2026, 10, 9),
+        trip_place="Алматы",
+        trip_target="Обучение",
+        main_order_number="",
+        main_order_start_date=None,
+        deputy_fullname=None,
+        deputy_names=None,
+    )
+
+
+def report_worker(
+    worker_id: int, orders: List[Order], report_file_path: str
+) -> None:
+    report = RunReport(report_file_path=report_file_path, today=TODAY)
+    for order in orders:
+        report.add(
+            order.employee_fullname, order, "Создание приказа", "Приказ создан"
+        )
+
+
+def failing_worker(
+    worker_id: int, orders: List[Order], report_file_path: str
+) -> None:
+    report_worker(worker_id, orders[:1], report_file_path)
+    if worker_id == 0:
+        raise RuntimeError("Colvir session lost")
+
+
+class PartitionOrdersTest(unittest.TestCase):
+    def test_employee_orders_stay_together(self):
+        orders = [
+            make_order("Иванов Иван", "1"),
+            make_order("Петров Петр", "2"),
+            make_order("ИВАНОВ  иван", "3"),
+            make_order("Сидоров Сидор", "4"),
+        ]
+        partitions = partition_orders(orders, worker_count=2)
+
+        self.assertEqual(len(partitions), 2)
+        numbers = [[order.order_number for order in p] for p in partitions]
+        self.assertIn(["1", "3"], numbers)
+        self.assertEqual(sorted(sum(numbers, [])), ["1", "2", "3", "4"])
+
+    def test_partitions_keep_order_and_balance(self):
+        orders = [make_order(f"Сотрудник {i}", str(i)) for i in range(7)]
+        partitions = partition_orders(orders, worker_count=3)
+
+        self.assertEqual(sorted(len(p) for p in partitions), [2, 2, 3])
+        for partition in partitions:
+            numbers = [int(order.order_number) for order in partition]
+            self.assertEqual(numbers, sorted(numbers))
+
+    def test_no_empty_partitions(self):
+        orders = [make_order("Иванов Иван", "1")]
+        self.assertEqual(partition_orders(orders, worker_count=4), [orders])
+        self.assertEqual(partition_orders([], worker_count=4), [])
+
+
+class ShardedRunTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.report_file_path = os.path.join(self.folder.name, "report.xlsx")
+        self.report = RunReport(
+            report_file_path=self.report_file_path, today=TODAY
+        )
+        self.orders = [make_order(f"Сотрудник {i}", str(i)) for i in range(6)]
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def report_numbers(self) -> List[str]:
+        return sorted(row["Номер приказа"] for row in self.report.rows)
+
+    def test_rows_of_all_workers_are_merged(self):
+        run_sharded(
+            orders=self.orders,
+            worker_count=3,
+            worker=report_worker,
+            report=self.report,
+        )
+
+        self.assertEqual(
+            self.report_numbers(), [o.order_number for o in self.orders]
+        )
+        self.assertEqual(os.listdir(self.folder.name), ["report.jsonl"])
+
+    def test_failed_worker_rows_are_kept(self):
+        run_sharded(
+            orders=self.orders,
+            worker_count=2,
+            worker=failing_worker,
+            report=self.report,
+        )
+
+        # Каждый обработчик успел записать по одной строке
+        self.assertEqual(len(self.report.rows), 2)
+        reloaded = RunReport(
+            report_file_path=self.report_file_path, today=TODAY
+        )
+        self.assertEqual(reloaded.rows, self.report.rows)
+
+
+class MergeReportTest(unittest.TestCase):
+    def test_merge_skips_known_rows_and_removes_journal(self):
+        with tempfile.TemporaryDirectory() as folder:
+            report = RunReport(
+                report_file_path=os.path.join(folder, "report.xlsx"),
+                today=TODAY,
+            )
+            other_path = worker_report_path(report.report_file_path, 1)
+            orders = [make_order("Иванов Иван", str(i)) for i in range(3)]
+            report_worker(0, orders[:2], report.report_file_path)
+            report = RunReport(
+                report_file_path=report.report_file_path, today=TODAY
+            )
+            report_worker(1, orders[1:], other_path)
+
+            merge_report(report=report, report_path=other_path)
+
+            self.assertEqual(
+                [row["Номер приказа"] for row in report.rows],
+                ["0", "1", "2"],
+            )
+            self.assertFalse(
+                os.path.exists(os.path.splitext(other_path)[0] + ".jsonl")
+            )
+
+    def test_merge_of_missing_report(self):
+        with tempfile.TemporaryDirectory() as folder:
+            report = RunReport(
+                report_file_path=os.path.join(folder, "report.xlsx"),
+                today=TODAY,
+            )
+            merge_report(
+                report=report,
+                report_path=os.path.join(folder, "report_w5.xlsx"),
+            )
+            self.assertEqual(report.rows, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import os
+import tempfile
+import unittest
+
+import openpyxl
+
+from src.existing_orders import TRIP_ORDER_TYPE, ExistingOrders
+
+
+def write_bulk_export(file_path: str, rows) -> None:
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(["Приказы сотрудников"])
+    sheet.append(["Сотрудник", "Вид приказа", "Номер приказа"])
+    for row in rows:
+        sheet.append(row)
+    workbook.save(file_path)
+
+
+class ExistingOrdersTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.folder.name, "orders_all.xlsx")
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_bulk_covers_only_employees_in_file(self):
+        write_bulk_export(
+            self.file_path,
+            [
+                ["Иванов Иван Иванович", TRIP_ORDER_TYPE, "12"],
+                ["Сидоров Сидор", TRIP_ORDER_TYPE, "7"],
+            ],
+        )
+        existing_orders = ExistingOrders()
+        existing_orders.load_bulk(
+            self.file_path,
+            employees=["ИВАНОВ  Иван Иванович", "Петров Петр Петрович"],
+        )
+
+        self.assertTrue(existing_orders.covers("Иванов Иван Иванович"))
+        self.assertTrue(existing_orders.exists("Иванов Иван Иванович", "12"))
+        # Сотрудника нет в выгрузке - его приказы выгружаются отдельно
+        self.assertFalse(existing_orders.covers("Петров Петр Петрович"))
+        # Сотрудник не из пачки покрытым не считается
+        self.assertFalse(existing_orders.covers("Сидоров Сидор"))
+
+    def test_employee_export_covers_employee(self):
+        write_bulk_export(self.file_path, [])
+        existing_orders = ExistingOrders()
+        existing_orders.load_bulk(
+            self.file_path, employees=["Петров Петр Петрович"]
+        )
+        self.assertFalse(existing_orders.covers("Петров Петр Петрович"))
+
+        employee_export = os.path.join(self.folder.name, "orders.xlsx")
+        write_bulk_export(employee_export, [["", TRIP_ORDER_TYPE, "15"]])
+        existing_orders.load_employee_export(
+            employee_export, employee="Петров Петр Петрович"
+        )
+        self.assertTrue(existing_orders.covers("Петров Петр Петрович"))
+        self.assertTrue(existing_orders.exists("Петров Петр Петрович", "15"))
+
+
+if __name__ == "__main__":
+    unittest.main()
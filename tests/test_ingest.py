@@ -0,0 +1,89 @@
+import glob
+import os
+import tempfile
+import unittest
+from datetime import date, datetime
+
+import openpyxl
+
+from src.bpm_report import BPM_COLUMNS
+from src.ingest import ingest_report
+
+
+def bpm_row(order_number: str, trip_place, start_date) -> list:
+    values = {
+        "employee_fullname": "Иванов Иван Иванович",
+        "order_number": order_number,
+        "sign_date": "01.10.2026",
+        "start_date": start_date,
+        "end_date": "09.10.2026",
+        "trip_place": trip_place,
+        "trip_target": "Обучение",
+        "main_order_number": None,
+        "main_order_start_date": None,
+        "deputy_fullname": None,
+    }
+    return [values[field] for field in BPM_COLUMNS.values()]
+
+
+class IngestReportTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.report_path = os.path.join(self.folder.name, "orders.xlsx")
+
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.append(["Отчет по командировкам"])
+        sheet.append(list(BPM_COLUMNS))
+        sheet.append(bpm_row("1", "Алматы", "05.10.2026"))
+        sheet.append(bpm_row("2", None, "05.10.2026"))
+        sheet.append(bpm_row("3", "Астана", datetime(2026, 10, 5, 9, 0)))
+        sheet.append(bpm_row("4", "Астана", "5 октября"))
+        workbook.save(self.report_path)
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_malformed_rows_do_not_abort_the_batch(self):
+        ingested = ingest_report(
+            report_path=self.report_path, cache_folder=self.folder.name
+        )
+
+        self.assertEqual(
+            [order.order_number for order in ingested.orders], ["1", "3"]
+        )
+        # Дата со временем из ячейки Excel
+        self.assertEqual(ingested.orders[1].start_date, date(2026, 10, 5))
+
+        malformed = {
+            record.order_number: record for record in ingested.malformed
+        }
+        self.assertEqual(sorted(malformed), ["2", "4"])
+        self.assertEqual(
+            malformed["2"].reason,
+            'Не заполнены колонки "Место командирования"',
+        )
+        self.assertIn('"Дата начала"', malformed["4"].reason)
+        self.assertEqual(
+            malformed["2"].employee_fullname, "Иванов Иван Иванович"
+        )
+
+    def test_cache_keeps_malformed_rows_and_replaces_old_caches(self):
+        old_cache_path = os.path.join(self.folder.name, "orders_v1_0.pickle")
+        open(old_cache_path, "wb").close()
+
+        first = ingest_report(
+            report_path=self.report_path, cache_folder=self.folder.name
+        )
+        second = ingest_report(
+            report_path=self.report_path, cache_folder=self.folder.name
+        )
+
+        self.assertEqual(first, second)
+        caches = glob.glob(os.path.join(self.folder.name, "*.pickle"))
+        self.assertEqual(len(caches), 1)
+        self.assertNotEqual(caches[0], old_cache_path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from datetime import date
+
+from src.order import Order
+from src.order_state import (
+    CREATED,
+    DONE,
+    EXECUTED,
+    PENDING,
+    REPORTED,
+    OrderStates,
+)
+
+
+def make_order(employee: str, order_number: str) -> Order:
+    return Order(
+        employee_fullname=employee,
+        employee_names=tuple(employee.split()),
+        order_number=order_number,
+        sign_date=date(2026, 10, 1),
+        start_date=date(2026, 10, 5),
+        end_date=date(2026, 10, 9),
+        trip_place="Алматы",
+        trip_target="Обучение",
+        main_order_number="",
+        main_order_start_date=None,
+        deputy_fullname=None,
+        deputy_names=None,
+    )
+
+
+class OrderStatesTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.folder.name, "states.sqlite")
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_only_finished_orders_are_done(self):
+        created = make_order("Иванов Иван", "12")
+        on_vacation = make_order("Петров Петр", "12")
+
+        order_states = OrderStates(self.db_path)
+        order_states.advance(created, EXECUTED)
+        order_states.finish(created, DONE)
+        order_states.advance(created, REPORTED)
+        # Строка в отчете есть, но приказ не создан
+        order_states.advance(on_vacation, REPORTED)
+        order_states.close()
+
+        order_states = OrderStates(self.db_path)
+        self.assertEqual(order_states.done(), {OrderStates.key(created)})
+        self.assertEqual(order_states.get(created), REPORTED)
+        self.assertEqual(order_states.get(on_vacation), REPORTED)
+        order_states.close()
+
+    def test_finish_keeps_state(self):
+        order = make_order("Иванов Иван", "12")
+        order_states = OrderStates(self.db_path)
+
+        order_states.finish(order, DONE)
+        self.assertEqual(order_states.get(order), PENDING)
+        order_states.advance(order, CREATED)
+        self.assertEqual(order_states.get(order), CREATED)
+        self.assertEqual(order_states.done(), {OrderStates.key(order)})
+        order_states.close()
+
+    def test_database_without_outcome_column(self):
+        connection = sqlite3.connect(self.db_path)
+        connection.execute(
+            "CREATE TABLE order_state ("
+            "employee TEXT NOT NULL, "
+            "order_number TEXT NOT NULL, "
+            "state TEXT NOT NULL, "
+            "updated TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP, "
+            "PRIMARY KEY (employee, order_number))"
+        )
+        connection.execute(
+            "INSERT INTO order_state (employee, order_number, state) "
+            "VALUES ('иванов иван', '12', 'reported')"
+        )
+        connection.commit()
+        connection.close()
+
+        order_states = OrderStates(self.db_path)
+        order = make_order("Иванов Иван", "12")
+        self.assertEqual(order_states.get(order), REPORTED)
+        self.assertEqual(order_states.done(), set())
+        order_states.finish(order, DONE)
+        self.assertEqual(order_states.done(), {OrderStates.key(order)})
+        order_states.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
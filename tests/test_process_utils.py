@@ -0,0 +1,92 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import psutil
+
+from src.process_utils import ProcessRegistry, snapshot_processes
+
+SLEEPER = [sys.executable, "-c", "import time; time.sleep(60)"]
+
+
+class ProcessRegistryTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.state_path = os.path.join(self.folder.name, "pids.json")
+        self.sleepers = []
+
+    def tearDown(self):
+        for sleeper in self.sleepers:
+            sleeper.kill()
+            sleeper.wait()
+        self.folder.cleanup()
+
+    def start_sleeper(self) -> subprocess.Popen:
+        sleeper = subprocess.Popen(SLEEPER)
+        self.sleepers.append(sleeper)
+        return sleeper
+
+    def assert_stopped(self, sleeper: subprocess.Popen) -> None:
+        self.assertIsNotNone(sleeper.wait(timeout=10))
+
+    def test_register_owned_terminate(self):
+        registry = ProcessRegistry(state_path=self.state_path)
+        sleeper = self.start_sleeper()
+
+        registry.register(sleeper.pid)
+        self.assertEqual(
+            [proc.pid for proc in registry.owned([sleeper.pid])],
+            [sleeper.pid],
+        )
+        self.assertTrue(os.path.exists(self.state_path))
+
+        registry.terminate(timeout=2)
+        self.assert_stopped(sleeper)
+        self.assertEqual(registry.pids, {})
+
+    def test_reused_pid_is_not_terminated(self):
+        registry = ProcessRegistry()
+        sleeper = self.start_sleeper()
+
+        # Тот же PID, но другое время создания - чужой процесс
+        create_time = psutil.Process(sleeper.pid).create_time()
+        registry.pids[sleeper.pid] = create_time - 100
+        self.assertEqual(registry.owned([sleeper.pid]), [])
+
+        registry.terminate(timeout=2)
+        self.assertIsNone(sleeper.poll())
+
+    def test_terminate_stale_from_saved_file(self):
+        sleeper = self.start_sleeper()
+        ProcessRegistry(state_path=self.state_path).register(sleeper.pid)
+
+        registry = ProcessRegistry(state_path=self.state_path)
+        self.assertTrue(registry.terminate_stale(timeout=2))
+        self.assert_stopped(sleeper)
+        self.assertEqual(registry.pids, {})
+
+    def test_terminate_stale_without_file(self):
+        registry = ProcessRegistry(state_path=self.state_path)
+        self.assertFalse(registry.terminate_stale())
+        self.assertFalse(ProcessRegistry().terminate_stale())
+
+    def test_register_new(self):
+        old_sleeper = self.start_sleeper()
+        proc_name = psutil.Process(old_sleeper.pid).name()
+        before = snapshot_processes(proc_name)
+        new_sleeper = self.start_sleeper()
+
+        registry = ProcessRegistry()
+        pids = registry.register_new(proc_name, before)
+
+        self.assertIn(new_sleeper.pid, pids)
+        self.assertNotIn(old_sleeper.pid, pids)
+        registry.terminate(pids, timeout=2)
+        self.assert_stopped(new_sleeper)
+        self.assertIsNone(old_sleeper.poll())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import unittest
+from typing import List, Tuple
+
+from src.toolbar_search import ButtonNotFoundError, locate_button
+
+# Кнопка панели: подсказка и крайние точки (включительно) вдоль панели
+ToolbarButton = Tuple[str, int, int]
+
+
+class FakeToolbar:
+    """
+    Панель инструментов с кнопками на оси x (или y для вертикальной
+    панели) и строкой состояния, показывающей подсказку кнопки под мышью.
+    """
+
+    def __init__(
+        self,
+        buttons: List[ToolbarButton],
+        rectangle: Tuple[int, int, int, int],
+        horizontal: bool = True,
+    ):
+        self.buttons = buttons
+        self.rectangle = rectangle
+        self.horizontal = horizontal
+        self.probes: List[Tuple[int, int]] = []
+
+    def status_bar(self, x: int, y: int) -> str:
+        self.probes.append((x, y))
+        left, top, right, bottom = self.rectangle
+        if not (left <= x < right and top <= y < bottom):
+            return ""
+        point = x if self.horizontal else y
+        for name, first, last in self.buttons:
+            if first <= point <= last:
+                return name
+        return ""
+
+
+BUTTONS = [
+    ("Создать", 100, 122),
+    ("Сохранить", 125, 147),
+    ("Очистить фильтр", 150, 172),
+    ("Операции", 300, 322),
+]
+
+
+class LocateButtonTest(unittest.TestCase):
+    def test_finds_button_centers(self):
+        for name, first, last in BUTTONS:
+            toolbar = FakeToolbar(BUTTONS, rectangle=(100, 40, 400, 64))
+            x, y = locate_button(
+                probe=toolbar.status_bar,
+                rectangle=toolbar.rectangle,
+                target=name,
+            )
+            self.assertEqual((x, y), ((first + last) // 2, 52), name)
+            # Грубый проход и уточнение краев вместо перебора по пикселю
+            self.assertLess(len(toolbar.probes), 40, name)
+            self.assertTrue(all(py == 52 for _, py in toolbar.probes))
+
+    def test_vertical_toolbar(self):
+        buttons = [("Фильтр", 210, 229), ("Печать", 230, 249)]
+        toolbar = FakeToolbar(
+            buttons, rectangle=(10, 200, 34, 300), horizontal=False
+        )
+        x, y = locate_button(
+            probe=toolbar.status_bar,
+            rectangle=toolbar.rectangle,
+            target="Печать",
+            horizontal=False,
+        )
+        self.assertEqual((x, y), (22, 239))
+
+    def test_buttons_at_toolbar_edges(self):
+        buttons = [("Первая", 0, 15), ("Последняя", 80, 99)]
+        rectangle = (0, 0, 100, 20)
+        expected = {"Первая": 7, "Последняя": 89}
+        for name, center in expected.items():
+            toolbar = FakeToolbar(buttons, rectangle=rectangle)
+            x, _ = locate_button(
+                probe=toolbar.status_bar,
+                rectangle=rectangle,
+                target=name,
+                coarse_step=10,
+            )
+            self.assertEqual(x, center, name)
+
+    def test_missing_button(self):
+        toolbar = FakeToolbar(BUTTONS, rectangle=(100, 40, 400, 64))
+        with self.assertRaisesRegex(ButtonNotFoundError, "not found on"):
+            locate_button(
+                probe=toolbar.status_bar,
+                rectangle=toolbar.rectangle,
+                target="Удалить",
+            )
+
+    def test_probe_budget_exhausted(self):
+        toolbar = FakeToolbar(BUTTONS, rectangle=(100, 40, 400, 64))
+        with self.assertRaisesRegex(ButtonNotFoundError, "in 5 probes"):
+            locate_button(
+                probe=toolbar.status_bar,
+                rectangle=toolbar.rectangle,
+                target="Операции",
+                max_probes=5,
+            )
+        self.assertEqual(len(toolbar.probes), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
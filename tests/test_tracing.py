@@ -0,0 +1,34 @@
+import json
+import os
+import tempfile
+import unittest
+
+from src.tracing import Tracer
+
+
+class TracerTest(unittest.TestCase):
+    def test_each_configure_starts_a_new_run(self):
+        with tempfile.TemporaryDirectory() as folder:
+            log_path = os.path.join(folder, "trace.jsonl")
+            tracer = Tracer()
+
+            tracer.configure(log_path)
+            with tracer.span("batch"):
+                pass
+            tracer.configure(log_path)
+            with tracer.span("batch"):
+                pass
+            tracer.configure(log_path, run_id="run-1")
+            with tracer.span("batch"):
+                pass
+
+            with open(log_path, "r", encoding="utf-8") as f:
+                runs = [json.loads(line)["run"] for line in f]
+
+        self.assertEqual(len(runs), 3)
+        self.assertNotEqual(runs[0], runs[1])
+        self.assertEqual(runs[2], "run-1")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import os
+import tempfile
+import unittest
+from datetime import date
+
+from src.cities import CityResolver
+from src.ingest import MalformedRecord
+from src.order import Order
+from src.report import RunReport
+from src.validation import preflight
+
+
+def make_order(employee: str, order_number: str) -> Order:
+    return Order(
+        employee_fullname=employee,
+        employee_names=tuple(employee.split()),
+        order_number=order_number,
+        sign_date=date(2026, 10, 1),
+        start_date=date(2026, 10, 5),
+        end_date=date(2026, 10, 9),
+        trip_place="Алматы",
+        trip_target="Обучение",
+        main_order_number="",
+        main_order_start_date=None,
+        deputy_fullname=None,
+        deputy_names=None,
+    )
+
+
+class PreflightTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.report = RunReport(
+            report_file_path=os.path.join(self.folder.name, "report.xlsx"),
+            today="18.10.26",
+        )
+        self.city_resolver = CityResolver({"Алматы": "Almaty.Алматы"})
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def run_preflight(self, orders):
+        return preflight(
+            orders=orders,
+            city_codes=self.city_resolver.resolve_many(orders),
+            city_resolver=self.city_resolver,
+            report=self.report,
+        )
+
+    def test_same_number_for_different_employees(self):
+        orders = [
+            make_order("Иванов Иван", "12"),
+            make_order("Петров Петр", "12"),
+        ]
+        self.assertEqual(self.run_preflight(orders), orders)
+        self.assertEqual(self.report.rows, [])
+
+    def test_repeated_order_of_same_employee(self):
+        orders = [
+            make_order("Иванов Иван", "12"),
+            make_order("ИВАНОВ иван", "12"),
+        ]
+        self.assertEqual(self.run_preflight(orders), orders[:1])
+        self.assertEqual(len(self.report.rows), 1)
+        self.assertIn("Повторный номер приказа", self.report.rows[0]["Статус"])
+
+    def test_malformed_records_are_reported(self):
+        orders = [make_order("Иванов Иван", "12")]
+        malformed = [
+            MalformedRecord(
+                employee_fullname="Петров Петр",
+                order_number="13",
+                reason='Не заполнены колонки "Место командирования"',
+            )
+        ]
+        passed = preflight(
+            orders=orders,
+            city_codes=self.city_resolver.resolve_many(orders),
+            city_resolver=self.city_resolver,
+            report=self.report,
+            malformed=malformed,
+        )
+
+        self.assertEqual(passed, orders)
+        self.assertEqual(len(self.report.rows), 1)
+        row = self.report.rows[0]
+        self.assertEqual(row["Сотрудник"], "Петров Петр")
+        self.assertEqual(row["Номер приказа"], "13")
+        self.assertIn("Место командирования", row["Статус"])
+
+
+if __name__ == "__main__":
+    unittest.main()